@@ -2,19 +2,45 @@
 # -*- coding: utf-8 -*-
 
 import os
-import sqlite3
 import json
+import base64
+import hmac
 import logging
 from datetime import datetime, timedelta
+from functools import wraps
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
-import feedparser
 import requests
-from urllib.parse import urljoin
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import time
+import random
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
 import atexit
+import socket
+from http_utils import get_session, reset_connect_time, get_connect_time, drain_response
+from feed_utils import (
+    parse_feed_stream, normalize_entries, read_feed, parse_in_pool, shutdown_parse_pool,
+    CHUNK_SIZE, PARSE_EXECUTOR, MAX_ITEMS_PER_SOURCE
+)
+from dedup_utils import known_urls
+from archive_utils import run_retention
+from stream_utils import broker, stream_articles, STREAM_RETRY_AFTER
+from jobs_utils import CollectJobManager, job_target, COLLECT_MIN_INTERVAL, COLLECT_JOB_TTL
+from metrics_utils import format_prometheus
+from sources_utils import sources_registry, source_record
+from cache_utils import cached_response, conditional_response, response_cache
+from response_utils import article_page_response, parse_fields, compress_response
+from db_utils import (
+    ensure_schema, acquire_lease, release_lease, execute_query, fetch_one,
+    save_articles_batch, load_feed_validators, save_feed_validators,
+    load_poll_schedule, save_poll_schedule, save_source_metrics, get_job,
+    get_latest_source_metrics, get_source_health, get_publication_counts,
+    get_region_counts, get_article_totals, list_articles, search_articles as search_db,
+    get_last_collection_date, add_source, update_source
+)
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -23,383 +49,454 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__, static_folder='static', static_url_path='')
 CORS(app)
 
-# Route principale pour servir l'index
-@app.route('/')
-def index():
-    return send_from_directory(app.static_folder, 'index.html')
-
-# Configuration de la base de données
-DATABASE_URL = os.environ.get('DATABASE_URL')
-if DATABASE_URL:
-    # PostgreSQL sur Render
-    import psycopg2
-    from urllib.parse import urlparse
-    DATABASE = DATABASE_URL
-    USE_POSTGRES = True
-else:
-    # SQLite en local
-    DATABASE = 'pqr_articles.db'
-    USE_POSTGRES = False
-
-# Sources RSS complètes - 68 sources
-RSS_SOURCES = {
-    'Auvergne-Rhône-Alpes': [
-        {'name': 'Le Dauphiné libéré', 'url': 'https://www.ledauphine.com/rss'},
-        {'name': 'Le Progrès', 'url': 'https://www.leprogres.fr/rss'},
-        {'name': 'La Montagne', 'url': 'https://www.lamontagne.fr/rss'},
-        {'name': 'L\'Éveil de la Haute-Loire', 'url': 'https://www.leveil.fr/rss'},
-        {'name': 'France Bleu Isère', 'url': 'https://www.francebleu.fr/rss/a-la-une/isere'},
-        {'name': 'Lyon Mag', 'url': 'https://www.lyonmag.com/rss.xml'}
-    ],
-    'Bourgogne-Franche-Comté': [
-        {'name': 'Le Journal de Saône-et-Loire', 'url': 'https://www.lejsl.com/rss'},
-        {'name': 'Le Bien public', 'url': 'https://www.bienpublic.com/rss'},
-        {'name': 'L\'Yonne républicaine', 'url': 'https://www.lyonne.fr/rss'},
-        {'name': 'L\'Est républicain', 'url': 'https://www.estrepublicain.fr/rss'},
-        {'name': 'France Bleu Bourgogne', 'url': 'https://www.francebleu.fr/rss/a-la-une/bourgogne'}
-    ],
-    'Bretagne': [
-        {'name': 'Ouest-France Bretagne', 'url': 'https://www.ouest-france.fr/rss-en-continu.xml'},
-        {'name': 'Le Télégramme', 'url': 'https://www.letelegramme.fr/rss.xml'},
-        {'name': 'France Bleu Breizh Izel', 'url': 'https://www.francebleu.fr/rss/a-la-une/breizh-izel'}
-    ],
-    'Centre-Val de Loire': [
-        {'name': 'La République du Centre', 'url': 'https://www.larep.fr/rss'},
-        {'name': 'Le Berry républicain', 'url': 'https://www.leberry.fr/rss'},
-        {'name': 'L\'Écho républicain', 'url': 'https://www.lechorepublicain.fr/rss'},
-        {'name': 'France Bleu Berry', 'url': 'https://www.francebleu.fr/rss/a-la-une/berry'}
-    ],
-    'Corse': [
-        {'name': 'Corse-Matin', 'url': 'https://www.corsematin.com/rss'},
-        {'name': 'France Bleu RCFM', 'url': 'https://www.francebleu.fr/rss/a-la-une/rcfm'}
-    ],
-    'Grand Est': [
-        {'name': 'Les Dernières Nouvelles d\'Alsace', 'url': 'https://www.dna.fr/rss'},
-        {'name': 'L\'Alsace', 'url': 'https://www.lalsace.fr/rss'},
-        {'name': 'Le Républicain lorrain', 'url': 'https://www.republicain-lorrain.fr/rss'},
-        {'name': 'L\'Union', 'url': 'https://www.lunion.fr/rss'},
-        {'name': 'Vosges Matin', 'url': 'https://www.vosgesmatin.fr/rss'},
-        {'name': 'France Bleu Alsace', 'url': 'https://www.francebleu.fr/rss/a-la-une/alsace'},
-        {'name': 'France Bleu Lorraine', 'url': 'https://www.francebleu.fr/rss/a-la-une/lorraine-nord'}
-    ],
-    'Hauts-de-France': [
-        {'name': 'La Voix du Nord', 'url': 'https://www.lavoixdunord.fr/rss'},
-        {'name': 'Le Courrier picard', 'url': 'https://www.courrier-picard.fr/rss'},
-        {'name': 'Nord éclair', 'url': 'https://www.nordeclair.fr/rss'},
-        {'name': 'Nord Littoral', 'url': 'https://www.nordlittoral.fr/rss'},
-        {'name': 'France Bleu Nord', 'url': 'https://www.francebleu.fr/rss/a-la-une/nord'}
-    ],
-    'Île-de-France': [
-        {'name': 'Le Parisien', 'url': 'https://www.leparisien.fr/rss.xml'},
-        {'name': 'France Bleu Paris', 'url': 'https://www.francebleu.fr/rss/a-la-une/107-1'},
-        {'name': 'Actu.fr Paris', 'url': 'https://actu.fr/ile-de-france/rss'}
-    ],
-    'Normandie': [
-        {'name': 'La Presse de la Manche', 'url': 'https://www.lamanchelibre.fr/rss'},
-        {'name': 'Paris Normandie', 'url': 'https://www.paris-normandie.fr/rss'},
-        {'name': 'France Bleu Normandie', 'url': 'https://www.francebleu.fr/rss/a-la-une/normandie-caen'}
-    ],
-    'Nouvelle-Aquitaine': [
-        {'name': 'Sud Ouest', 'url': 'https://www.sudouest.fr/rss.xml'},
-        {'name': 'Charente libre', 'url': 'https://www.charentelibre.fr/rss'},
-        {'name': 'Le Populaire du Centre', 'url': 'https://www.lepopulaire.fr/rss'},
-        {'name': 'La Nouvelle République des Pyrénées', 'url': 'https://www.nrpyrenees.fr/rss'},
-        {'name': 'France Bleu Gironde', 'url': 'https://www.francebleu.fr/rss/a-la-une/gironde'},
-        {'name': 'France Bleu Périgord', 'url': 'https://www.francebleu.fr/rss/a-la-une/perigord'}
-    ],
-    'Occitanie': [
-        {'name': 'La Dépêche du Midi', 'url': 'https://www.ladepeche.fr/rss.xml'},
-        {'name': 'Midi libre', 'url': 'https://www.midilibre.fr/rss'},
-        {'name': 'L\'Indépendant', 'url': 'https://www.lindependant.fr/rss'},
-        {'name': 'Centre Presse', 'url': 'https://www.centrepresseaveyron.fr/rss'},
-        {'name': 'France Bleu Toulouse', 'url': 'https://www.francebleu.fr/rss/a-la-une/toulouse'},
-        {'name': 'France Bleu Hérault', 'url': 'https://www.francebleu.fr/rss/a-la-une/herault'}
-    ],
-    'Pays de la Loire': [
-        {'name': 'Le Courrier de l\'Ouest', 'url': 'https://www.courrierdelouest.fr/rss'},
-        {'name': 'Le Maine libre', 'url': 'https://www.ouest-france.fr/maine-libre/rss.xml'},
-        {'name': 'Presse-Océan', 'url': 'https://www.presseocean.fr/rss'},
-        {'name': 'France Bleu Loire Océan', 'url': 'https://www.francebleu.fr/rss/a-la-une/loire-ocean'}
-    ],
-    'Provence-Alpes-Côte d\'Azur': [
-        {'name': 'La Provence', 'url': 'https://www.laprovence.com/rss/une.xml'},
-        {'name': 'Nice-Matin', 'url': 'https://www.nicematin.com/rss'},
-        {'name': 'Var-Matin', 'url': 'https://www.varmatin.com/rss'},
-        {'name': 'France Bleu Azur', 'url': 'https://www.francebleu.fr/rss/a-la-une/azur'}
-    ],
-    'Guadeloupe': [
-        {'name': 'France-Antilles Guadeloupe', 'url': 'https://www.franceantilles.fr/guadeloupe/rss.xml'},
-        {'name': 'France Bleu Guadeloupe', 'url': 'https://www.francebleu.fr/rss/a-la-une/guadeloupe'}
-    ],
-    'Martinique': [
-        {'name': 'France-Antilles Martinique', 'url': 'https://www.franceantilles.fr/martinique/rss.xml'},
-        {'name': 'France Bleu Martinique', 'url': 'https://www.francebleu.fr/rss/a-la-une/martinique'}
-    ],
-    'Guyane': [
-        {'name': 'La Presse de Guyane', 'url': 'https://www.franceguyane.fr/rss.xml'},
-        {'name': 'France Bleu Guyane', 'url': 'https://www.francebleu.fr/rss/a-la-une/guyane'}
-    ],
-    'La Réunion': [
-        {'name': 'Le Journal de l\'île de La Réunion', 'url': 'https://www.clicanoo.re/rss.xml'},
-        {'name': 'Le Quotidien de la Réunion', 'url': 'https://www.lequotidien.re/rss.xml'},
-        {'name': 'France Bleu La Réunion', 'url': 'https://www.francebleu.fr/rss/a-la-une/la-reunion'}
-    ],
-    'Mayotte': [
-        {'name': 'Mayotte Hebdo', 'url': 'https://lejournaldemayotte.yt/feed/'}
-    ]
-}
-
-def init_database():
-    """Initialiser la base de données"""
-    if USE_POSTGRES:
-        # PostgreSQL
-        conn = psycopg2.connect(DATABASE)
-        cursor = conn.cursor()
-        
-        # Table des articles
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS articles (
-                id SERIAL PRIMARY KEY,
-                titre TEXT NOT NULL,
-                url TEXT UNIQUE NOT NULL,
-                description TEXT,
-                source TEXT NOT NULL,
-                region TEXT NOT NULL,
-                date_publication TIMESTAMP,
-                date_collecte TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Table des collectes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS collectes (
-                id SERIAL PRIMARY KEY,
-                date_collecte TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                nb_sources_total INTEGER,
-                nb_sources_ok INTEGER,
-                nb_articles_nouveaux INTEGER,
-                details TEXT
-            )
-        ''')
-        
-        # Index pour les performances
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_region ON articles(region)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(date_publication DESC)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)')
-        
-    else:
-        # SQLite
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
-        # Table des articles
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                titre TEXT NOT NULL,
-                url TEXT UNIQUE NOT NULL,
-                description TEXT,
-                source TEXT NOT NULL,
-                region TEXT NOT NULL,
-                date_publication DATETIME,
-                date_collecte DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Table des collectes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS collectes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date_collecte DATETIME DEFAULT CURRENT_TIMESTAMP,
-                nb_sources_total INTEGER,
-                nb_sources_ok INTEGER,
-                nb_articles_nouveaux INTEGER,
-                details TEXT
-            )
-        ''')
-        
-        # Index pour les performances
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_region ON articles(region)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(date_publication DESC)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)')
-    
-    conn.commit()
-    conn.close()
-    logger.info("Base de données initialisée")
+# Taille maximum d'une page d'articles dans l'API
+MAX_PAGE_SIZE = 500
+
+# Configuration de la collecte concurrente
+COLLECT_WORKERS = int(os.environ.get('COLLECT_WORKERS', 16))
+COLLECT_PER_HOST = int(os.environ.get('COLLECT_PER_HOST', 4))
+# Délai (s) de récupération d'un flux, sauf réglage propre à la source
+FETCH_TIMEOUT = 10
+
+# Planification des récupérations : 'adaptive' (intervalle propre à chaque
+# source, appris de son rythme de publication) ou 'fixed' (tout toutes les 15 min)
+POLL_MODE = os.environ.get('POLL_MODE', 'adaptive')
+POLL_TICK = int(os.environ.get('POLL_TICK', 60))
+POLL_DEFAULT_INTERVAL = int(os.environ.get('POLL_DEFAULT_INTERVAL', 15 * 60))
+POLL_MIN_INTERVAL = int(os.environ.get('POLL_MIN_INTERVAL', 5 * 60))
+POLL_MAX_INTERVAL = int(os.environ.get('POLL_MAX_INTERVAL', 6 * 3600))
+POLL_MAX_BACKOFF = int(os.environ.get('POLL_MAX_BACKOFF', 24 * 3600))
+POLL_TARGET_ITEMS = float(os.environ.get('POLL_TARGET_ITEMS', 3))
+POLL_HISTORY_DAYS = int(os.environ.get('POLL_HISTORY_DAYS', 7))
+POLL_JITTER = 0.1
+
+# Mode du collecteur : 'embedded' (dans les processus web, un seul élu),
+# 'worker' (processus dédié : python worker.py) ou 'off'
+COLLECTOR_MODE = os.environ.get('COLLECTOR_MODE', 'embedded')
+COLLECTOR_LEASE = 'collecteur'
+COLLECTOR_LEASE_TTL = int(os.environ.get('COLLECTOR_LEASE_TTL', 180))
+
+# Jeton des routes d'administration (/api/admin/...) : désactivées s'il est absent
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
 
-def fetch_rss_feed(source_name, url, region):
-    """Récupérer et parser un flux RSS"""
+def get_host_semaphore(url):
+    """Obtenir le sémaphore limitant les requêtes simultanées vers un même hôte"""
+    host = urlparse(url).netloc.lower()
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(COLLECT_PER_HOST)
+        return _host_semaphores[host]
+
+def interleave_by_host(tasks):
+    """Entrelacer les tâches par hôte pour ne pas bloquer le pool sur un seul site"""
+    by_host = {}
+    for task in tasks:
+        by_host.setdefault(urlparse(task[1]['url']).netloc.lower(), []).append(task)
+    
+    interleaved = []
+    queues = list(by_host.values())
+    while queues:
+        for queue in queues:
+            interleaved.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return interleaved
+
+def fetch_rss_feed(source_name, url, region, validators=None, timeout=FETCH_TIMEOUT, max_items=MAX_ITEMS_PER_SOURCE):
+    """Récupérer et parser un flux RSS
+    
+    Renvoie un dictionnaire avec les articles et l'état de la requête. Si le
+    flux n'a pas changé depuis la dernière collecte (réponse 304), aucun
+    article n'est renvoyé et 'non_modifie' vaut True. 'timeout' et
+    'max_items' viennent des réglages de la source.
+    """
+    result = {
+        'url': url,
+        'source': source_name,
+        'region': region,
+        'ok': False,
+        'non_modifie': False,
+        'articles': [],
+        'connus': 0,
+        'etag': None,
+        'last_modified': None,
+        'mesures': {
+            'statut': 0,
+            'connexion_ms': 0,
+            'attente_ms': 0,
+            'telechargement_ms': 0,
+            'octets': 0,
+            'analyse_ms': 0,
+            'items': 0,
+            'erreur': None
+        }
+    }
+    mesures = result['mesures']
+    
     try:
         logger.info(f"Collecte {source_name} ({region}): {url}")
         
-        # Headers pour éviter les blocages
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-            'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-            'Cache-Control': 'no-cache'
-        }
-        
-        # Récupérer le flux avec timeout
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parser avec feedparser
-        feed = feedparser.parse(response.content)
+        # Requête conditionnelle si le flux a déjà été récupéré
+        headers = {}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
         
-        if feed.bozo and feed.bozo_exception:
-            logger.warning(f"Avertissement parsing {source_name}: {feed.bozo_exception}")
-        
-        articles = []
-        for entry in feed.entries[:20]:  # Limiter à 20 articles par source
+        # Récupérer le flux en streaming (nombre de requêtes simultanées limité par hôte) :
+        # la lecture s'arrête dès que MAX_ITEMS_PER_SOURCE articles sont analysés
+        # ou que MAX_FEED_BYTES octets ont été reçus
+        with get_host_semaphore(url):
+            reset_connect_time()
+            try:
+                response = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+            finally:
+                mesures['connexion_ms'] = int(get_connect_time() * 1000)
+            
             try:
-                # Extraire les données
-                titre = entry.get('title', '').strip()
-                link = entry.get('link', '').strip()
-                description = entry.get('summary', entry.get('description', '')).strip()
+                mesures['statut'] = response.status_code
+                # response.elapsed inclut l'ouverture de connexion : on ne garde que l'attente du serveur
+                mesures['attente_ms'] = max(int(response.elapsed.total_seconds() * 1000) - mesures['connexion_ms'], 0)
                 
-                # Date de publication
-                date_pub = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    date_pub = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    date_pub = datetime(*entry.updated_parsed[:6])
-                else:
-                    date_pub = datetime.now()
+                if response.status_code == 304:
+                    logger.info(f"⏸️ {source_name}: flux non modifié")
+                    result['ok'] = True
+                    result['non_modifie'] = True
+                    return result
                 
-                # Nettoyer la description
-                if description:
-                    # Supprimer les balises HTML basiques
-                    import re
-                    description = re.sub(r'<[^>]+>', '', description)
-                    description = description.replace('&nbsp;', ' ').replace('&amp;', '&')
-                    if len(description) > 300:
-                        description = description[:300] + '...'
+                response.raise_for_status()
+                result['etag'] = response.headers.get('ETag')
+                result['last_modified'] = response.headers.get('Last-Modified')
                 
-                if titre and link:
-                    articles.append({
-                        'titre': titre,
-                        'url': link,
-                        'description': description,
-                        'source': source_name,
-                        'region': region,
-                        'date_publication': date_pub
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Erreur parsing article {source_name}: {e}")
-                continue
+                if PARSE_EXECUTOR == 'process':
+                    data, lecture = read_feed(response.iter_content(CHUNK_SIZE))
+                else:
+                    chunks = response.iter_content(CHUNK_SIZE)
+                    entries, lecture = parse_feed_stream(chunks, max_items)
+                    # Lecture arrêtée à max_items : finir une réponse courte
+                    # pour réutiliser la connexion
+                    drain_response(response, chunks)
+            finally:
+                response.close()
+        
+        mesures['telechargement_ms'] = int(lecture['telechargement_s'] * 1000)
+        mesures['octets'] = lecture['octets']
+        
+        if PARSE_EXECUTOR == 'process':
+            # Analyse et nettoyage dans un autre processus : seuls les articles
+            # normalisés reviennent, le filtrage des URLs connues se fait ici
+            parsed, analyse = parse_in_pool(data, source_name, region, max_items)
+            articles = [article for article in parsed if article['url_canonique'] not in known_urls]
+            result['connus'] = len(parsed) - len(articles)
+            mesures['items'] = analyse['items']
+            mesures['analyse_ms'] = int(analyse['analyse_s'] * 1000)
+            lecture['avertissement'] = analyse.get('avertissement')
+        else:
+            start = time.perf_counter()
+            articles, result['connus'] = normalize_entries(entries, source_name, region, known=known_urls)
+            mesures['items'] = len(entries)
+            mesures['analyse_ms'] = int((lecture['analyse_s'] + time.perf_counter() - start) * 1000)
         
-        logger.info(f"✅ {source_name}: {len(articles)} articles récupérés")
-        return articles
+        if lecture.get('avertissement'):
+            logger.warning(f"Avertissement parsing {source_name}: {lecture['avertissement']}")
+        
+        logger.info(f"✅ {source_name}: {len(articles)} articles récupérés ({result['connus']} déjà connus)")
+        result['ok'] = bool(articles) or result['connus'] > 0
+        result['articles'] = articles
+        if not result['ok']:
+            mesures['erreur'] = 'aucun article'
+        return result
         
     except requests.exceptions.Timeout:
         logger.error(f"❌ {source_name}: Timeout")
-        return []
+        mesures['erreur'] = 'timeout'
+        return result
     except requests.exceptions.RequestException as e:
         logger.error(f"❌ {source_name}: Erreur réseau - {e}")
-        return []
+        mesures['erreur'] = f"réseau: {type(e).__name__}"
+        return result
     except Exception as e:
         logger.error(f"❌ {source_name}: Erreur - {e}")
-        return []
+        mesures['erreur'] = f"{type(e).__name__}: {e}"[:200]
+        return result
 
 def save_articles(articles):
     """Sauvegarder les articles en base"""
-    if not articles:
-        return 0
-    
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    nouveaux = 0
-    for article in articles:
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO articles 
-                (titre, url, description, source, region, date_publication)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                article['titre'],
-                article['url'],
-                article['description'],
-                article['source'],
-                article['region'],
-                article['date_publication']
-            ))
-            
-            if cursor.rowcount > 0:
-                nouveaux += 1
-                
-        except Exception as e:
-            logger.error(f"Erreur sauvegarde article: {e}")
-            continue
-    
-    conn.commit()
-    conn.close()
-    
-    return nouveaux
+    return len(save_articles_batch(articles))
 
-def collect_all_feeds():
-    """Collecter tous les flux RSS"""
-    logger.info("🚀 Début de la collecte RSS complète")
+def summarize_region(region, source_results, nouveaux):
+    """Construire le résumé de collecte d'une région"""
+    sources_total = len(source_results)
+    region_ok = sum(1 for result in source_results if result['ok'])
+    region_non_modifiees = sum(1 for result in source_results if result['non_modifie'])
+    articles_total = sum(len(result['articles']) + result['connus'] for result in source_results)
+    
+    if region_ok:
+        logger.info(f"📍 {region}: {region_ok}/{sources_total} sources OK ({region_non_modifiees} non modifiées), {nouveaux} nouveaux articles")
+    return {
+        'sources_ok': region_ok,
+        'sources_total': sources_total,
+        'sources_non_modifiees': region_non_modifiees,
+        'articles_nouveaux': nouveaux,
+        'articles_total': articles_total
+    }
+
+def collect_sources(tasks, label='complète', job=None):
+    """Collecter une liste de sources, données sous forme de couples (région, source)
+    
+    Si 'job' est fourni (tâche de collecte), il est informé de chaque source récupérée.
+    """
+    logger.info(f"🚀 Début de la collecte RSS {label} ({len(tasks)} sources)")
     start_time = datetime.now()
     
-    total_sources = sum(len(sources) for sources in RSS_SOURCES.values())
-    sources_ok = 0
-    total_nouveaux = 0
-    details = {}
+    total_sources = len(tasks)
+    validators = load_feed_validators()
+    
+    # Récupérer tous les flux en parallèle (ordre des régions conservé)
+    results = {}
+    for region, source in tasks:
+        results.setdefault(region, [])
+    
+    with ThreadPoolExecutor(max_workers=COLLECT_WORKERS, thread_name_prefix='collect') as executor:
+        futures = {
+            executor.submit(
+                fetch_rss_feed, source['name'], source['url'], region, validators.get(source['url']),
+                source.get('delai') or FETCH_TIMEOUT, source.get('max_articles') or MAX_ITEMS_PER_SOURCE
+            ): region
+            for region, source in interleave_by_host(tasks)
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]].append(result)
+            if job:
+                job.source_done(futures[future], result)
+    
+    # Une seule écriture groupée pour toute la collecte
+    all_results = [result for region_results in results.values() for result in region_results]
+    all_articles = [article for result in all_results for article in result['articles']]
+    try:
+        nouveaux_articles = save_articles_batch(all_articles)
+        known_urls.update(article['url_canonique'] for article in all_articles)
+        if nouveaux_articles:
+            # Réveiller le flux SSE des clients connectés à ce processus
+            broker.notify()
+        # Les validateurs ne sont enregistrés qu'une fois les articles sauvegardés
+        save_feed_validators(all_results)
+    except Exception as e:
+        logger.error(f"Erreur sauvegarde articles: {e}")
+        nouveaux_articles = []
     
-    for region, sources in RSS_SOURCES.items():
-        region_articles = []
-        region_ok = 0
-        
-        for source in sources:
-            articles = fetch_rss_feed(source['name'], source['url'], region)
-            if articles:
-                sources_ok += 1
-                region_ok += 1
-                region_articles.extend(articles)
-        
-        # Sauvegarder les articles de la région
-        if region_articles:
-            nouveaux = save_articles(region_articles)
-            total_nouveaux += nouveaux
-            details[region] = {
-                'sources_ok': region_ok,
-                'sources_total': len(sources),
-                'articles_nouveaux': nouveaux,
-                'articles_total': len(region_articles)
-            }
-            logger.info(f"📍 {region}: {region_ok}/{len(sources)} sources OK, {nouveaux} nouveaux articles")
-        else:
-            details[region] = {
-                'sources_ok': 0,
-                'sources_total': len(sources),
-                'articles_nouveaux': 0,
-                'articles_total': 0
-            }
+    # Planifier la prochaine récupération de chaque source
+    try:
+        update_poll_schedule(tasks, all_results)
+    except Exception as e:
+        logger.error(f"Erreur planification des sources: {e}")
+    
+    # Mesures par source (durées, volume, statut)
+    try:
+        record_source_metrics(all_results, nouveaux_articles)
+    except Exception as e:
+        logger.error(f"Erreur enregistrement des mesures: {e}")
+    
+    nouveaux_par_region = {}
+    for article in nouveaux_articles:
+        nouveaux_par_region[article['region']] = nouveaux_par_region.get(article['region'], 0) + 1
+    
+    details = {
+        region: summarize_region(region, region_results, nouveaux_par_region.get(region, 0))
+        for region, region_results in results.items()
+    }
+    sources_ok = sum(region_details['sources_ok'] for region_details in details.values())
+    sources_non_modifiees = sum(region_details['sources_non_modifiees'] for region_details in details.values())
+    total_nouveaux = len(nouveaux_articles)
     
     # Enregistrer la collecte
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('''
+    execute_query('''
         INSERT INTO collectes (nb_sources_total, nb_sources_ok, nb_articles_nouveaux, details)
         VALUES (?, ?, ?, ?)
     ''', (total_sources, sources_ok, total_nouveaux, json.dumps(details)))
-    conn.commit()
-    conn.close()
+    
+    # Les réponses en cache restent valides si rien de nouveau n'est arrivé
+    if nouveaux_articles:
+        response_cache.invalidate()
     
     duration = datetime.now() - start_time
-    logger.info(f"✅ Collecte terminée en {duration.total_seconds():.1f}s: {sources_ok}/{total_sources} sources OK, {total_nouveaux} nouveaux articles")
+    logger.info(f"✅ Collecte terminée en {duration.total_seconds():.1f}s: {sources_ok}/{total_sources} sources OK ({sources_non_modifiees} non modifiées), {total_nouveaux} nouveaux articles")
     
     return {
         'sources_total': total_sources,
         'sources_ok': sources_ok,
+        'sources_non_modifiees': sources_non_modifiees,
         'articles_nouveaux': total_nouveaux,
         'duration': duration.total_seconds(),
         'details': details
     }
 
+def record_source_metrics(source_results, nouveaux_articles):
+    """Enregistrer les mesures de récupération de chaque source collectée"""
+    nouveaux_par_source = {}
+    for article in nouveaux_articles:
+        nouveaux_par_source[article['source']] = nouveaux_par_source.get(article['source'], 0) + 1
+    
+    now = time.time()
+    rows = []
+    for result in source_results:
+        mesures = result['mesures']
+        rows.append((
+            now, result['source'], result['region'], mesures['statut'],
+            mesures['connexion_ms'], mesures['attente_ms'], mesures['telechargement_ms'],
+            mesures['octets'], mesures['analyse_ms'], mesures['items'],
+            nouveaux_par_source.get(result['source'], 0), mesures['erreur']
+        ))
+    save_source_metrics(rows)
+
+def collect_all_feeds():
+    """Collecter tous les flux RSS"""
+    return collect_sources(sources_registry.tasks())
+
+# Planification adaptative : chaque source a son propre intervalle
+_publication_rates = {'loaded_at': 0, 'rates': {}}
+_publication_rates_lock = threading.Lock()
+
+def get_publication_rates():
+    """Obtenir le rythme de publication (articles/seconde) de chaque source
+    
+    Calculé sur les POLL_HISTORY_DAYS derniers jours d'articles et
+    rafraîchi au plus une fois par heure.
+    """
+    with _publication_rates_lock:
+        if time.time() - _publication_rates['loaded_at'] > 3600:
+            since = datetime.utcnow() - timedelta(days=POLL_HISTORY_DAYS)
+            window = POLL_HISTORY_DAYS * 86400
+            _publication_rates['rates'] = {
+                source: count / window
+                for source, count in get_publication_counts(since).items()
+            }
+            _publication_rates['loaded_at'] = time.time()
+        return _publication_rates['rates']
+
+def poll_interval(source_name, failures=0):
+    """Intervalle (en secondes) avant la prochaine récupération d'une source
+    
+    Vise POLL_TARGET_ITEMS nouveaux articles par récupération d'après le
+    rythme de publication observé ; double à chaque échec consécutif.
+    """
+    rate = get_publication_rates().get(source_name)
+    interval = POLL_TARGET_ITEMS / rate if rate else POLL_DEFAULT_INTERVAL
+    interval = max(POLL_MIN_INTERVAL, min(interval, POLL_MAX_INTERVAL))
+    
+    if failures:
+        interval = min(interval * 2 ** min(failures, 16), POLL_MAX_BACKOFF)
+    return interval
+
+def update_poll_schedule(tasks, source_results):
+    """Enregistrer la prochaine date de récupération des sources collectées"""
+    names = {source['url']: source['name'] for region, source in tasks}
+    schedule = load_poll_schedule()
+    now = time.time()
+    
+    rows = []
+    for result in source_results:
+        previous = schedule.get(result['url'], {})
+        failures = 0 if result['ok'] or result['non_modifie'] else previous.get('echecs', 0) + 1
+        interval = poll_interval(names[result['url']], failures)
+        # Décalage aléatoire pour étaler les requêtes dans le temps
+        next_poll = now + interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        rows.append((result['url'], int(interval), next_poll, failures, now))
+    
+    save_poll_schedule(rows)
+
+def get_due_sources():
+    """Lister les sources dont la prochaine récupération est échue"""
+    schedule = load_poll_schedule()
+    now = time.time()
+    
+    return [
+        (region, source)
+        for region, source in sources_registry.tasks()
+        if schedule.get(source['url'], {}).get('prochaine_collecte', 0) <= now
+    ]
+
+def run_collect_job(tasks, job):
+    """Exécuter une tâche de collecte (appelé par le gestionnaire de tâches)"""
+    cible = job.data['cible']
+    if cible['type'] == 'echues':
+        label = 'planifiée'
+    elif cible['type'] == 'tout':
+        label = 'complète'
+    else:
+        label = cible['source'] or cible['region']
+    return collect_sources(tasks, label=label, job=job)
+
+# Une seule collecte à la fois, manuelle ou planifiée, tous processus confondus
+job_manager = CollectJobManager(run_collect_job)
+
+def encode_cursor(date_publication, article_id):
+    """Encoder la position (date_publication, id) d'un article en curseur opaque"""
+    raw = json.dumps([str(date_publication), article_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Décoder un curseur de pagination (ValueError si invalide)"""
+    try:
+        date_publication, article_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(date_publication), int(article_id)
+    except Exception:
+        raise ValueError(f"Curseur invalide: {cursor}")
+
+def get_page_args(default_limit):
+    """Lire les paramètres 'limit', 'cursor' et 'fields' de la requête (ValueError si invalides)"""
+    limit = request.args.get('limit', default_limit, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    fields = parse_fields(request.args.get('fields'))
+    return limit, decode_cursor(cursor) if cursor else None, fields
+
+def group_duplicates(rows):
+    """Regrouper les quasi-doublons d'une liste de lignes d'articles
+    
+    Chaque ligne se termine par le groupe de l'article. Le premier article
+    d'un groupe est conservé et reçoit la liste de ses reprises ('doublons').
+    """
+    articles = []
+    groups = {}
+    for row in rows:
+        titre, url, description, source, region, date_publication, date_collecte, groupe = row
+        if groupe in groups:
+            groups[groupe]['doublons'].append({'titre': titre, 'url': url, 'source': source, 'region': region})
+            continue
+        article = {
+            'titre': titre,
+            'url': url,
+            'description': description,
+            'source': source,
+            'region': region,
+            'date_publication': date_publication,
+            'date_collecte': date_collecte,
+            'doublons': []
+        }
+        groups[groupe] = article
+        articles.append(article)
+    return articles
+
+def build_page(rows, limit):
+    """Construire une page d'articles à partir de lignes (id en tête, limit + 1 lignes lues)
+    
+    Les quasi-doublons sont regroupés au sein de la page : elle peut donc
+    contenir moins de 'limit' articles sans être la dernière.
+    """
+    articles = group_duplicates([row[1:] for row in rows[:limit]])
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[6], last[0])
+    
+    return articles, next_cursor
+
 # Routes API
 @app.route('/')
 def index():
@@ -412,121 +509,75 @@ def static_files(filename):
     return send_from_directory('static', filename)
 
 @app.route('/api/regions')
+@conditional_response
+@cached_response
 def get_regions():
     """Obtenir la liste des régions avec statistiques"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
+    counts = get_region_counts()
+    
+    sources = sources_registry.by_region()
     
     regions = []
-    for region_name in RSS_SOURCES.keys():
-        # Compter les articles de la région
-        cursor.execute('SELECT COUNT(*) FROM articles WHERE region = ?', (region_name,))
-        nb_articles = cursor.fetchone()[0]
-        
-        # Compter les sources
-        nb_sources = len(RSS_SOURCES[region_name])
+    for region in sources_registry.regions().values():
+        # Régions sans source active ignorées
+        if region['nom'] not in sources:
+            continue
         
         regions.append({
-            'id': region_name.lower().replace(' ', '-').replace('\'', ''),
-            'nom': region_name,
-            'nb_articles': nb_articles,
-            'nb_sources': nb_sources
+            'id': region['slug'],
+            'nom': region['nom'],
+            'nb_articles': counts.get(region['nom'], 0),
+            'nb_sources': len(sources[region['nom']])
         })
     
-    conn.close()
     return jsonify(regions)
 
 @app.route('/api/regions/<region_name>/articles')
+@conditional_response
+@cached_response
 def get_region_articles(region_name):
-    """Obtenir les articles d'une région"""
-    # Décoder le nom de région
-    region_name = region_name.replace('-', ' ').replace('_', '\'')
-    
-    # Trouver la région exacte
-    actual_region = None
-    for region in RSS_SOURCES.keys():
-        if region.lower().replace(' ', '-').replace('\'', '') == region_name.lower():
-            actual_region = region
-            break
-    
-    if not actual_region:
+    """Obtenir les articles d'une région (désignée par son identifiant, ex. 'auvergne-rhône-alpes')"""
+    region = sources_registry.region_for_slug(region_name)
+    if not region:
         return jsonify({'error': 'Région non trouvée'}), 404
     
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT titre, url, description, source, region, date_publication, date_collecte
-        FROM articles 
-        WHERE region = ?
-        ORDER BY date_publication DESC
-        LIMIT 100
-    ''', (actual_region,))
-    
-    articles = []
-    for row in cursor.fetchall():
-        articles.append({
-            'titre': row[0],
-            'url': row[1],
-            'description': row[2],
-            'source': row[3],
-            'region': row[4],
-            'date_publication': row[5],
-            'date_collecte': row[6]
-        })
+    try:
+        limit, before, fields = get_page_args(100)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    conn.close()
-    return jsonify({'articles': articles})
+    rows = list_articles(region_id=region['id'], limit=limit + 1, before=before)
+    articles, next_cursor = build_page(rows, limit)
+    return article_page_response(articles, fields, next_cursor=next_cursor)
 
 @app.route('/api/articles/top')
+@conditional_response
+@cached_response
 def get_top_articles():
     """Obtenir les top articles"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT titre, url, description, source, region, date_publication, date_collecte
-        FROM articles 
-        ORDER BY date_publication DESC
-        LIMIT 100
-    ''')
-    
-    articles = []
-    for row in cursor.fetchall():
-        articles.append({
-            'titre': row[0],
-            'url': row[1],
-            'description': row[2],
-            'source': row[3],
-            'region': row[4],
-            'date_publication': row[5],
-            'date_collecte': row[6]
-        })
+    try:
+        limit, before, fields = get_page_args(100)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    conn.close()
-    return jsonify({'articles': articles})
+    rows = list_articles(limit=limit + 1, before=before)
+    articles, next_cursor = build_page(rows, limit)
+    return article_page_response(articles, fields, next_cursor=next_cursor)
 
 @app.route('/api/stats')
 def get_stats():
-    """Obtenir les statistiques"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    # Statistiques générales
-    cursor.execute('SELECT COUNT(*) FROM articles')
-    total_articles = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(DISTINCT source) FROM articles')
-    sources_actives = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(DISTINCT region) FROM articles')
-    total_regions = cursor.fetchone()[0]
+    """Obtenir les statistiques
+
+    Pas de cache : la date de la dernière collecte change à chaque collecte,
+    même sans nouvel article, et les compteurs sont déjà pré-calculés.
+    """
+    # Statistiques générales (compteurs tenus à jour par la collecte)
+    total_articles, sources_actives, total_regions = get_article_totals()
     
     # Dernière collecte
-    cursor.execute('SELECT * FROM collectes ORDER BY date_collecte DESC LIMIT 1')
-    derniere_collecte = cursor.fetchone()
+    derniere_collecte = fetch_one('SELECT * FROM collectes ORDER BY id DESC LIMIT 1')
     
-    total_sources = sum(len(sources) for sources in RSS_SOURCES.values())
+    total_sources = len(sources_registry.tasks())
     
     stats = {
         'total_articles': total_articles,
@@ -536,24 +587,144 @@ def get_stats():
         'derniere_collecte': derniere_collecte[1] if derniere_collecte else None
     }
     
-    conn.close()
     return jsonify(stats)
 
+@app.route('/metrics')
+def metrics():
+    """Exposer les métriques par source au format Prometheus"""
+    total_articles, sources_actives, total_regions = get_article_totals()
+    derniere_collecte = get_last_collection_date()
+    
+    totals = {
+        'pqr_articles_total': ('Nombre d\'articles en base', total_articles),
+        'pqr_sources_active': ('Sources ayant au moins un article', sources_actives),
+        'pqr_sources_configured': ('Sources configurées', len(sources_registry.tasks()))
+    }
+    if derniere_collecte:
+        totals['pqr_last_collection_timestamp_seconds'] = ('Date de la dernière collecte', derniere_collecte.timestamp())
+    
+    body = format_prometheus(get_latest_source_metrics(), totals)
+    return app.response_class(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/sources/health')
+def get_sources_health():
+    """Santé et durées de récupération de chaque source sur une période"""
+    hours = max(1, min(request.args.get('hours', 24, type=int), 24 * 30))
+    schedule = load_poll_schedule()
+    urls = {source['name']: source['url'] for source in sources_registry.all()}
+    latest = {mesure['source']: mesure for mesure in get_latest_source_metrics()}
+    
+    sources = []
+    for health in get_source_health(time.time() - hours * 3600):
+        last = latest.get(health['source'], {})
+        planning = schedule.get(urls.get(health['source']), {})
+        health.update({
+            'taux_succes': round(health['succes'] / health['recuperations'], 3) if health['recuperations'] else None,
+            'dernier_statut': last.get('statut'),
+            'derniere_erreur': last.get('erreur'),
+            'intervalle': planning.get('intervalle'),
+            'prochaine_collecte': planning.get('prochaine_collecte'),
+            'echecs_consecutifs': planning.get('echecs')
+        })
+        for key in ('connexion_ms_moy', 'attente_ms_moy', 'telechargement_ms_moy', 'analyse_ms_moy'):
+            health[key] = round(health[key] or 0, 1)
+        sources.append(health)
+    
+    # Les sources qui pèsent le plus dans la durée de collecte en premier
+    sources.sort(key=lambda health: health['duree_ms_totale'] or 0, reverse=True)
+    return jsonify({'periode_heures': hours, 'sources': sources})
+
+@app.route('/api/stream')
+def stream():
+    """Flux Server-Sent Events des nouveaux articles (filtrable par région)
+    
+    La région est désignée par son identifiant (ex. 'bretagne'), comme sur
+    /api/regions/<region>/articles. Chaque événement porte l'id de l'article :
+    après une coupure, le navigateur renvoie Last-Event-ID et reçoit les
+    articles manqués.
+    """
+    region = None
+    if request.args.get('region'):
+        region = sources_registry.region_for_slug(request.args['region'])
+        if not region:
+            return jsonify({'error': 'Région non trouvée'}), 404
+        region = region['nom']
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID invalide'}), 400
+    
+    # Nombre de clients borné : au-delà, ils occuperaient tous les threads du worker
+    subscriber = broker.subscribe(region)
+    if subscriber is None:
+        response = app.response_class(f'retry: {STREAM_RETRY_AFTER * 1000}\n\n', status=503, mimetype='text/event-stream')
+        response.headers['Retry-After'] = str(STREAM_RETRY_AFTER)
+        return response
+    
+    response = app.response_class(stream_articles(subscriber, last_id), mimetype='text/event-stream')
+    # Désabonner aussi un client parti avant le début du flux
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    response.headers['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy (nginx)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/collect', methods=['POST'])
 def trigger_collect():
-    """Déclencher une collecte manuelle"""
+    """Déclencher une collecte manuelle (toutes les sources, une région ou une source)
+    
+    Une demande faite pendant une collecte qui la couvre rejoint celle-ci ;
+    une demande plus large est mise en attente et part à la fin de la
+    collecte en cours. La réponse donne l'id de la tâche à suivre sur
+    /api/collect/<id>.
+    """
+    params = request.get_json(silent=True) or {}
+    region = params.get('region') or request.args.get('region')
+    source_name = params.get('source') or request.args.get('source')
+    
+    tasks = sources_registry.tasks()
+    if region:
+        if region not in sources_registry.by_region():
+            return jsonify({'status': 'error', 'message': 'Région non trouvée'}), 404
+        tasks = [(name, source) for name, source in tasks if name == region]
+    if source_name:
+        tasks = [(name, source) for name, source in tasks if source['name'] == source_name]
+        if not tasks:
+            return jsonify({'status': 'error', 'message': 'Source non trouvée'}), 404
+        region = tasks[0][0]
+    
     try:
-        # Lancer la collecte dans un thread séparé
-        def run_collect():
-            collect_all_feeds()
-        
-        thread = threading.Thread(target=run_collect)
-        thread.start()
-        
-        return jsonify({'status': 'success', 'message': 'Collecte démarrée'})
+        job, etat = job_manager.submit(job_target(region, source_name), tasks)
     except Exception as e:
         logger.error(f"Erreur déclenchement collecte: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+    if etat == 'cree':
+        return jsonify({'status': 'success', 'message': 'Collecte démarrée', 'job': job}), 202
+    if etat == 'rejoint':
+        return jsonify({'status': 'success', 'message': 'Collecte déjà en cours', 'job': job}), 202
+    if etat == 'en_attente':
+        return jsonify({'status': 'success', 'message': 'Collecte lancée à la fin de la collecte en cours', 'job': job}), 202
+    if etat == 'occupe':
+        return jsonify({'status': 'error', 'message': 'Une autre collecte est en cours', 'job': job}), 409
+    
+    retry_after = max(int(COLLECT_MIN_INTERVAL - (time.time() - job['fin'])), 1)
+    response = jsonify({
+        'status': 'error',
+        'message': f'Collecte récente, réessayez dans {retry_after}s',
+        'job': job
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+@app.route('/api/collect/<job_id>')
+def get_collect_status(job_id):
+    """État et progression par région d'une tâche de collecte"""
+    job = get_job(job_id, time.time() - COLLECT_JOB_TTL)
+    if not job:
+        return jsonify({'error': 'Tâche non trouvée'}), 404
+    return jsonify(job)
 
 @app.route('/api/search')
 def search_articles():
@@ -564,62 +735,248 @@ def search_articles():
     if not query:
         return jsonify({'articles': []})
     
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_PAGE_SIZE))
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    sql = '''
-        SELECT titre, url, description, source, region, date_publication, date_collecte
-        FROM articles 
-        WHERE (titre LIKE ? OR description LIKE ? OR source LIKE ?)
-    '''
-    params = [f'%{query}%', f'%{query}%', f'%{query}%']
+    articles = group_duplicates(search_db(query, region, limit))
     
-    if region:
-        sql += ' AND region = ?'
-        params.append(region)
+    return article_page_response(articles, fields, total=len(articles))
+
+def admin_required(view):
+    """Réserver une route aux requêtes portant le jeton ADMIN_TOKEN (Authorization: Bearer ...)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Administration désactivée (ADMIN_TOKEN non défini)'}), 403
+        header = request.headers.get('Authorization', '')
+        token = header[7:] if header.startswith('Bearer ') else ''
+        if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Jeton invalide'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def read_source_settings(params):
+    """Lire les réglages modifiables d'une source (ValueError si invalides)"""
+    settings = {}
+    if 'url' in params:
+        url = str(params['url'] or '').strip()
+        if urlparse(url).scheme not in ('http', 'https'):
+            raise ValueError("URL invalide")
+        settings['url'] = url
+    if 'actif' in params:
+        actif = params['actif']
+        # Valeurs de formulaire ou de ligne de commande ("false", "0"...)
+        if isinstance(actif, str):
+            actif = {'true': True, '1': True, 'false': False, '0': False}.get(actif.strip().lower(), actif)
+        elif isinstance(actif, int) and not isinstance(actif, bool) and actif in (0, 1):
+            actif = bool(actif)
+        if not isinstance(actif, bool):
+            raise ValueError("'actif' doit être un booléen")
+        settings['actif'] = actif
+    for key in ('delai', 'max_articles'):
+        if key in params:
+            value = params[key]
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value <= 0):
+                raise ValueError(f"'{key}' doit être un entier positif")
+            settings[key] = value
+    return settings
+
+def source_json(source):
+    """Source du registre au format de l'API"""
+    return {
+        'id': source['id'],
+        'nom': source['name'],
+        'slug': source['slug'],
+        'url': source['url'],
+        'region': source['region'],
+        'actif': source['actif'],
+        'delai': source['delai'],
+        'max_articles': source['max_articles']
+    }
+
+def reload_sources():
+    """Recharger le registre des sources après une modification (les autres processus suivent sa version en base)"""
+    sources_registry.reload()
+    response_cache.invalidate()
+
+@app.route('/api/admin/sources')
+@admin_required
+def admin_list_sources():
+    """Lister toutes les sources, actives ou non"""
+    return jsonify({'sources': [source_json(source) for source in sources_registry.all()]})
+
+@app.route('/api/admin/sources', methods=['POST'])
+@admin_required
+def admin_add_source():
+    """Ajouter une source : {"nom", "url", "region", "delai", "max_articles"}"""
+    params = request.get_json(silent=True) or {}
+    nom = str(params.get('nom') or '').strip()
+    region = str(params.get('region') or '').strip()
+    if not nom or not region or 'url' not in params:
+        return jsonify({'error': "'nom', 'url' et 'region' sont obligatoires"}), 400
+    try:
+        settings = read_source_settings(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    sql += ' ORDER BY date_publication DESC LIMIT 50'
+    try:
+        add_source(source_record(nom, settings.pop('url'), region, **settings))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
     
-    cursor.execute(sql, params)
+    reload_sources()
+    logger.info(f"➕ Source ajoutée: {nom} ({region})")
+    return jsonify({'source': source_json(sources_registry.get(nom))}), 201
+
+@app.route('/api/admin/sources/<int:source_id>', methods=['PATCH'])
+@admin_required
+def admin_update_source(source_id):
+    """Modifier une source : {"actif", "url", "delai", "max_articles"}"""
+    try:
+        settings = read_source_settings(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    articles = []
-    for row in cursor.fetchall():
-        articles.append({
-            'titre': row[0],
-            'url': row[1],
-            'description': row[2],
-            'source': row[3],
-            'region': row[4],
-            'date_publication': row[5],
-            'date_collecte': row[6]
-        })
+    if not update_source(source_id, **settings):
+        return jsonify({'error': 'Source non trouvée'}), 404
     
-    conn.close()
-    return jsonify({'articles': articles, 'total': len(articles)})
+    reload_sources()
+    source = next(source for source in sources_registry.all() if source['id'] == source_id)
+    logger.info(f"✏️ Source modifiée: {source['name']} {settings}")
+    return jsonify({'source': source_json(source)})
 
-# Initialisation
-if __name__ == '__main__':
-    # Initialiser la base de données
-    init_database()
+@app.route('/api/admin/sources/reload', methods=['POST'])
+@admin_required
+def admin_reload_sources():
+    """Recharger le registre des sources (les autres processus le font d'eux-mêmes)"""
+    reload_sources()
+    sources = sources_registry.all()
+    return jsonify({'sources': len(sources), 'actives': sum(1 for source in sources if source['actif'])})
+
+# Collecteur : planification et élection du processus qui collecte
+_scheduler = None
+
+def collector_id():
+    """Identifiant du processus courant pour le verrou de collecteur"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def run_scheduled_collection():
+    """Collecte planifiée, exécutée uniquement par le processus élu"""
+    if not acquire_lease(COLLECTOR_LEASE, collector_id(), COLLECTOR_LEASE_TTL):
+        logger.info("Collecte planifiée ignorée : un autre processus est collecteur")
+        return
+    if POLL_MODE == 'adaptive':
+        tasks = get_due_sources()
+        if not tasks:
+            return
+        cible = job_target(due=True)
+    else:
+        tasks = sources_registry.tasks()
+        cible = job_target()
+    
+    job, etat = job_manager.submit(cible, tasks, origine='planifiee', wait=True)
+    if etat != 'cree':
+        logger.info(f"Collecte planifiée reportée : collecte {job['id'] if job else ''} en cours")
+
+def run_scheduled_retention():
+    """Archivage et purge quotidiens, exécutés uniquement par le processus élu"""
+    if not acquire_lease(COLLECTOR_LEASE, collector_id(), COLLECTOR_LEASE_TTL):
+        return
+    try:
+        result = run_retention()
+    except Exception as e:
+        logger.error(f"Erreur rétention: {e}")
+        return
+    # Les réponses en cache peuvent contenir des articles supprimés
+    if result['articles_archives']:
+        response_cache.invalidate()
+
+def renew_collector_lease():
+    """Prolonger (ou tenter de prendre) le verrou de collecteur"""
+    try:
+        acquire_lease(COLLECTOR_LEASE, collector_id(), COLLECTOR_LEASE_TTL)
+    except Exception as e:
+        logger.error(f"Erreur renouvellement verrou collecteur: {e}")
+
+def start_collector(blocking=False):
+    """Démarrer la planification des collectes
     
-    # Collecte initiale
-    logger.info("Collecte initiale au démarrage...")
-    collect_all_feeds()
+    Chaque processus peut appeler cette fonction : seul celui qui détient le
+    verrou 'collecteur' en base collecte réellement. La première collecte
+    part immédiatement, dans le thread du planificateur.
+    """
+    ensure_schema()
+    sources_registry.version()
     
-    # Programmer les collectes automatiques (toutes les 15 minutes)
-    scheduler = BackgroundScheduler()
+    scheduler = BlockingScheduler() if blocking else BackgroundScheduler()
     scheduler.add_job(
-        func=collect_all_feeds,
+        func=renew_collector_lease,
         trigger="interval",
-        minutes=15,
-        id='collect_rss'
+        seconds=COLLECTOR_LEASE_TTL / 3,
+        id='collector_lease'
     )
-    scheduler.start()
+    scheduler.add_job(
+        func=run_scheduled_collection,
+        trigger="interval",
+        # En mode adaptatif, la tâche ne fait que vérifier les sources échues
+        seconds=POLL_TICK if POLL_MODE == 'adaptive' else 15 * 60,
+        id='collect_rss',
+        next_run_time=datetime.now()
+    )
+    scheduler.add_job(
+        func=run_scheduled_retention,
+        trigger="interval",
+        hours=24,
+        id='retention',
+        # Pas en même temps que la première collecte
+        next_run_time=datetime.now() + timedelta(minutes=10)
+    )
+    
+    global _scheduler
+    _scheduler = scheduler
     
-    # Arrêter le scheduler à la fermeture
-    atexit.register(lambda: scheduler.shutdown())
+    # Libérer le verrou et arrêter le scheduler à la fermeture
+    atexit.register(stop_collector)
+    
+    logger.info(f"Collecteur démarré ({collector_id()})")
+    scheduler.start()
+    return scheduler
+
+def stop_collector():
+    """Arrêter la planification et libérer le verrou de collecteur"""
+    global _scheduler
+    if _scheduler is None:
+        return
+    if _scheduler.running:
+        _scheduler.shutdown(wait=False)
+    _scheduler = None
+    shutdown_parse_pool()
+    try:
+        release_lease(COLLECTOR_LEASE, collector_id())
+    except Exception as e:
+        logger.error(f"Erreur libération verrou collecteur: {e}")
+
+# Compression gzip / br des réponses JSON
+app.after_request(compress_response)
+
+@app.before_request
+def prepare_database():
+    """Créer les tables et le registre des sources au premier appel si besoin
+
+    Les articles ne portent que les ids de leur source et de leur région :
+    le registre doit être rempli avant toute lecture.
+    """
+    ensure_schema()
+    sources_registry.version()
+
+# Initialisation
+if __name__ == '__main__':
+    if COLLECTOR_MODE == 'embedded':
+        start_collector()
     
     # Démarrer l'application
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
-
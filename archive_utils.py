@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import gzip
+import logging
+from datetime import datetime, timedelta
+
+from db_utils import get_articles_before, delete_articles, prune_history, compact_database
+
+try:
+    import zstandard
+    ARCHIVE_EXTENSION = '.jsonl.zst'
+except ImportError:
+    zstandard = None
+    ARCHIVE_EXTENSION = '.jsonl.gz'
+
+logger = logging.getLogger(__name__)
+
+# Politique de rétention (0 désactive l'archivage des articles)
+RETENTION_DAYS = int(os.environ.get('RETENTION_DAYS', 90))
+HISTORY_RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', 30))
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archives')
+RETENTION_BATCH = int(os.environ.get('RETENTION_BATCH', 1000))
+
+ARCHIVE_FIELDS = ('id', 'titre', 'url', 'description', 'source', 'region', 'date_publication', 'date_collecte', 'groupe_id')
+
+def _compress(data):
+    """Compresser un bloc de lignes JSONL (zstd si disponible, sinon gzip)"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data)
+
+def archive_path(month):
+    """Chemin du fichier d'archive d'un mois ('AAAA-MM')"""
+    return os.path.join(ARCHIVE_DIR, f'articles-{month}{ARCHIVE_EXTENSION}')
+
+def write_archive(rows):
+    """Ajouter des articles aux archives mensuelles (mois de publication)
+
+    Chaque lot est ajouté en fin de fichier comme un bloc compressé
+    indépendant : zstd et gzip lisent les blocs concaténés comme un seul flux.
+    """
+    months = {}
+    for row in rows:
+        article = dict(zip(ARCHIVE_FIELDS, row))
+        month = str(article['date_publication'])[:7]
+        months.setdefault(month, []).append(json.dumps(article, ensure_ascii=False, default=str))
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for month, lines in months.items():
+        with open(archive_path(month), 'ab') as archive:
+            archive.write(_compress(('\n'.join(lines) + '\n').encode('utf-8')))
+            archive.flush()
+            os.fsync(archive.fileno())
+
+def run_retention():
+    """Archiver les articles anciens, purger l'historique et compacter la base
+
+    Les articles sont traités par lots de RETENTION_BATCH : chaque lot est
+    écrit dans l'archive avant d'être supprimé, et les transactions restent
+    courtes pour ne pas bloquer la collecte.
+    """
+    start = time.perf_counter()
+    archives = 0
+
+    if RETENTION_DAYS > 0:
+        cutoff = datetime.now() - timedelta(days=RETENTION_DAYS)
+        while True:
+            rows = get_articles_before(cutoff, RETENTION_BATCH)
+            if not rows:
+                break
+            write_archive(rows)
+            archives += delete_articles(rows)
+            if len(rows) < RETENTION_BATCH:
+                break
+
+    collectes, mesures = prune_history(time.time() - HISTORY_RETENTION_DAYS * 86400)
+    compact_database()
+
+    duration = time.perf_counter() - start
+    logger.info(f"🗄️ Rétention terminée en {duration:.1f}s: {archives} articles archivés, {collectes} collectes et {mesures} mesures purgées")
+    return {
+        'articles_archives': archives,
+        'collectes_purgees': collectes,
+        'mesures_purgees': mesures,
+        'duration': round(duration, 3)
+    }
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Comparer deux rapports de benchmark (bench/run_bench.py)
+
+    python bench/compare.py bench/results/avant.json bench/results/apres.json
+"""
+
+import sys
+import json
+import argparse
+
+def flatten(value, prefix=''):
+    """Aplatir les résultats en {chemin: valeur numérique}"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((str(index + 1), item) for index, item in enumerate(value))
+    else:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return {prefix: value}
+        return {}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f'{prefix}.{key}' if prefix else key))
+    return flat
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparer deux rapports de benchmark')
+    parser.add_argument('avant')
+    parser.add_argument('apres')
+    parser.add_argument('--seuil', type=float, default=0.0, help='écart relatif minimum affiché (ex. 0.05)')
+    args = parser.parse_args()
+
+    with open(args.avant, encoding='utf-8') as f:
+        avant = json.load(f)
+    with open(args.apres, encoding='utf-8') as f:
+        apres = json.load(f)
+
+    print(f"{avant.get('version')} -> {apres.get('version')}")
+    before = flatten(avant['resultats'])
+    after = flatten(apres['resultats'])
+    width = max((len(key) for key in after), default=0)
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        if old is None or new is None:
+            print(f"{key:<{width}}  {old!s:>12}  {new!s:>12}")
+            continue
+        delta = (new - old) / old if old else 0.0
+        if abs(delta) < args.seuil:
+            continue
+        print(f"{key:<{width}}  {old:>12}  {new:>12}  {delta:+.1%}")
+
+if __name__ == '__main__':
+    sys.exit(main())
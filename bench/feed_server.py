@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Simulateur local de flux RSS pour les benchmarks
+
+Sert des flux RSS 2.0 synthétiques sur un ou plusieurs ports (un port par
+« site » simulé, pour que la limite de requêtes par hôte s'applique comme en
+production), avec taille, latence, taux d'erreur et rythme de publication
+configurables. Les réponses gèrent ETag / If-None-Match.
+
+    python bench/feed_server.py --port 8800 --hosts 20 --latency 0.2 --error-rate 0.02
+"""
+
+import time
+import random
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+WORDS = (
+    'mairie conseil municipal travaux route départementale collège lycée école '
+    'pompiers incendie accident gendarmerie enquête tribunal procès commune '
+    'festival concert marché producteurs agriculteurs récolte météo orages '
+    'football rugby handball club victoire défaite match championnat supporters '
+    'hôpital santé médecin urgences association bénévoles solidarité élus '
+    'département région préfecture budget impôts entreprise emploi usine salariés '
+    'commerce centre-ville patrimoine église château exposition musée tourisme '
+    'plage port pêche montagne randonnée vélo course cyclisme marathon habitants'
+).split()
+
+class FeedConfig:
+    """Paramètres des flux simulés"""
+
+    def __init__(self, items=30, description_size=400, latency=0.1, jitter=0.5,
+                 error_rate=0.0, fresh_items=0, seed=1):
+        self.items = items
+        self.description_size = description_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Nombre de nouveaux articles publiés entre deux requêtes sur un flux
+        self.fresh_items = fresh_items
+        self.seed = seed
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+def render_feed(name, first_item, config):
+    """Construire le XML d'un flux dont le plus récent article est 'first_item'"""
+    now = time.time()
+    items = []
+    for number in range(first_item, first_item - config.items, -1):
+        rng = random.Random(f'{config.seed}:{name}:{number}')
+        title = _words(rng, rng.randint(6, 12)).capitalize()
+        description = _words(rng, max(config.description_size // 8, 1))[:config.description_size]
+        items.append(
+            '<item>'
+            f'<title>{escape(title)}</title>'
+            f'<link>https://bench.test/{escape(name)}/{number}?utm_source=rss</link>'
+            f'<description>{escape("<p>" + description + "</p>")}</description>'
+            f'<pubDate>{formatdate(now - (first_item - number) * 600)}</pubDate>'
+            '</item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>{escape(name)}</title>'
+        + ''.join(items) +
+        '</channel></rss>'
+    ).encode('utf-8')
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = FeedConfig()
+    generations = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        config = self.config
+        if config.latency:
+            time.sleep(max(random.uniform(config.latency * (1 - config.jitter), config.latency * (1 + config.jitter)), 0))
+        if random.random() < config.error_rate:
+            self._send(503, b'Service Unavailable')
+            return
+
+        name = self.path.strip('/').split('?')[0] or 'flux'
+        with self.lock:
+            generation = self.generations.get(name, config.items)
+            self.generations[name] = generation + config.fresh_items
+
+        etag = f'"{name}-{generation}"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, headers={'ETag': etag})
+            return
+        self._send(200, render_feed(name, generation, config), {
+            'Content-Type': 'application/rss+xml; charset=utf-8',
+            'ETag': etag
+        })
+
+def start_servers(config, port=8800, hosts=1, bind='127.0.0.1'):
+    """Démarrer 'hosts' serveurs (ports consécutifs) dans des threads ; renvoie la liste des serveurs"""
+    handler = type('BenchFeedHandler', (FeedHandler,), {'config': config, 'generations': {}, 'lock': threading.Lock()})
+    servers = []
+    for offset in range(hosts):
+        server = ThreadingHTTPServer((bind, port + offset), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulateur local de flux RSS')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--hosts', type=int, default=1, help='nombre de sites simulés (ports consécutifs)')
+    parser.add_argument('--items', type=int, default=30)
+    parser.add_argument('--description-size', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=0.1, help='latence moyenne (s)')
+    parser.add_argument('--jitter', type=float, default=0.5, help='variation relative de la latence')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fresh-items', type=int, default=0, help='nouveaux articles par requête')
+    args = parser.parse_args()
+
+    config = FeedConfig(args.items, args.description_size, args.latency, args.jitter, args.error_rate, args.fresh_items)
+    start_servers(config, args.port, args.hosts)
+    print(f"Flux simulés sur les ports {args.port} à {args.port + args.hosts - 1}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmarks de la collecte, de l'écriture des articles et des routes de l'API
+
+Tout tourne en local : les 68 sources sont redirigées vers le simulateur de
+flux (bench/feed_server.py), puis remises à leur URL d'origine, et la base
+est créée dans un répertoire de travail dédié (ou dans la base PostgreSQL de
+benchmark passée avec --database-url). Le rapport JSON peut être comparé à
+celui d'une autre version avec bench/compare.py.
+
+    python bench/run_bench.py --rows 100000 --output bench/results/v2.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from feed_server import FeedConfig, start_servers, WORDS
+from seed_db import add_database_argument, select_database
+
+def _git_version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _latency_summary(latencies, duration, errors):
+    """Résumé d'une série de durées (secondes) : percentiles en ms et débit"""
+    latencies = sorted(latencies)
+    if not latencies:
+        return {'requetes': 0, 'erreurs': errors}
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requetes': len(latencies),
+        'erreurs': errors,
+        'requetes_par_s': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p95_ms': round(percentiles[94] * 1000, 2),
+        'p99_ms': round(percentiles[98] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2)
+    }
+
+def redirect_sources(app, port, hosts):
+    """Rediriger chaque source vers le simulateur, un port par site d'origine
+
+    Renvoie les URLs d'origine ({id: url}), à remettre avec restore_sources.
+    """
+    from db_utils import update_source
+
+    origins = {}
+    urls = {}
+    try:
+        for source in app.sources_registry.all():
+            netloc = urlparse(source['url']).netloc
+            origins.setdefault(netloc, len(origins) % hosts)
+            slug = source['name'].replace(' ', '_')
+            update_source(source['id'], url=f'http://127.0.0.1:{port + origins[netloc]}/{slug}')
+            urls[source['id']] = source['url']
+    except Exception:
+        restore_sources(app, urls)
+        raise
+    app.sources_registry.reload()
+    return urls
+
+def restore_sources(app, urls):
+    """Remettre les sources à leur URL d'origine"""
+    from db_utils import update_source
+
+    for source_id, url in urls.items():
+        update_source(source_id, url=url)
+    app.sources_registry.reload()
+
+def bench_collect(app, runs):
+    """Collectes complètes successives (première à froid, puis en régime établi)"""
+    results = []
+    for run in range(runs):
+        start = time.perf_counter()
+        summary = app.collect_all_feeds()
+        results.append({
+            'collecte': run + 1,
+            'duree_s': round(time.perf_counter() - start, 3),
+            'sources_ok': summary['sources_ok'],
+            'sources_non_modifiees': summary['sources_non_modifiees'],
+            'articles_nouveaux': summary['articles_nouveaux']
+        })
+    return results
+
+def bench_save(app, rows, batch):
+    """Écriture groupée d'articles neufs puis de doublons (tous déjà en base)"""
+    from dedup_utils import article_fingerprint
+
+    rng = random.Random(2)
+    sources = [(region, source['name']) for region, source in app.sources_registry.tasks()]
+    articles = []
+    for number in range(rows):
+        region, source = rng.choice(sources)
+        titre = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize()
+        description = ' '.join(rng.choice(WORDS) for _ in range(30))
+        url = f'https://save.test/{time.time_ns()}/{number}'
+        articles.append({
+            'titre': titre,
+            'url': url,
+            'url_canonique': url,
+            'description': description,
+            'source': source,
+            'region': region,
+            'date_publication': datetime.now(),
+            'empreinte': article_fingerprint(titre, description)
+        })
+
+    report = {}
+    for label in ('nouveaux', 'doublons'):
+        start = time.perf_counter()
+        inserted = 0
+        for offset in range(0, rows, batch):
+            inserted += len(app.save_articles_batch([dict(article) for article in articles[offset:offset + batch]]))
+        duration = time.perf_counter() - start
+        report[label] = {
+            'articles': rows,
+            'inseres': inserted,
+            'duree_s': round(duration, 3),
+            'articles_par_s': round(rows / duration, 1)
+        }
+    return report
+
+def bench_routes(app, routes, requests_per_route, concurrency):
+    """Charger chaque route avec 'concurrency' clients simultanés sur un vrai serveur HTTP"""
+    import requests
+    from werkzeug.serving import make_server
+
+    port = _free_port()
+    server = make_server('127.0.0.1', port, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    local = threading.local()
+
+    def call(url):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=30)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    report = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for route in routes:
+                url = f'http://127.0.0.1:{port}{route}'
+                call(url)  # échauffement (cache, connexions)
+                start = time.perf_counter()
+                results = list(executor.map(call, [url] * requests_per_route))
+                duration = time.perf_counter() - start
+                report[route] = _latency_summary(
+                    [elapsed for elapsed, ok in results if ok], duration,
+                    sum(1 for elapsed, ok in results if not ok)
+                )
+                print(f"{route}: {report[route]}", file=sys.stderr)
+    finally:
+        server.shutdown()
+    return report
+
+def deep_cursor(app):
+    """Curseur pointant vers la moitié de la table (pagination profonde)"""
+    total = app.fetch_one('SELECT COUNT(*) FROM articles')[0]
+    row = app.fetch_one(
+        'SELECT date_publication, id FROM articles ORDER BY date_publication DESC, id DESC LIMIT 1 OFFSET ?',
+        (total // 2,)
+    )
+    return app.encode_cursor(row[0], row[1]) if row else None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks PQR')
+    parser.add_argument('--workdir', help='répertoire de la base SQLite (temporaire par défaut)')
+    parser.add_argument('--output', help='fichier du rapport JSON (sortie standard par défaut)')
+    parser.add_argument('--port', type=int, default=8800, help='premier port du simulateur de flux')
+    parser.add_argument('--hosts', type=int, default=20, help='nombre de sites simulés')
+    parser.add_argument('--items', type=int, default=30, help='articles par flux')
+    parser.add_argument('--description-size', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=0.2, help='latence moyenne des flux (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fresh-items', type=int, default=5, help='nouveaux articles par flux entre deux collectes')
+    parser.add_argument('--collect-runs', type=int, default=3)
+    parser.add_argument('--save-rows', type=int, default=5000)
+    parser.add_argument('--save-batch', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=10000, help='articles synthétiques ajoutés avant le test des routes')
+    parser.add_argument('--requests', type=int, default=500, help='requêtes par route')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--cache-ttl', type=float, help='durée du cache de réponses (0 pour le désactiver)')
+    parser.add_argument('--skip', action='append', default=[], choices=['collect', 'save', 'routes'])
+    add_database_argument(parser)
+    args = parser.parse_args()
+    select_database(parser, args)
+
+    # La base SQLite est créée dans le répertoire courant : s'y placer avant l'import
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix='pqr-bench-'))
+    if args.cache_ttl is not None:
+        os.environ['CACHE_TTL'] = str(args.cache_ttl)
+
+    import logging
+    logging.disable(logging.INFO)
+    import app
+    from db_utils import USE_POSTGRES
+    from seed_db import seed
+
+    config = FeedConfig(args.items, args.description_size, args.latency, 0.5, args.error_rate, args.fresh_items)
+    start_servers(config, args.port, args.hosts)
+    report = {
+        'version': _git_version(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plateforme': platform.platform(),
+        'base': 'postgresql' if USE_POSTGRES else 'sqlite',
+        'parametres': vars(args),
+        'resultats': {}
+    }
+    resultats = report['resultats']
+
+    app.ensure_schema()
+    urls = redirect_sources(app, args.port, args.hosts)
+    try:
+        if 'collect' not in args.skip:
+            resultats['collecte'] = bench_collect(app, args.collect_runs)
+        if 'save' not in args.skip:
+            resultats['sauvegarde'] = bench_save(app, args.save_rows, args.save_batch)
+        if 'routes' not in args.skip:
+            if args.rows:
+                resultats['remplissage'] = seed(args.rows)
+            cursor = deep_cursor(app)
+            routes = [
+                '/api/regions',
+                '/api/articles/top',
+                '/api/articles/top?limit=100' + (f'&cursor={cursor}' if cursor else ''),
+                '/api/regions/bretagne/articles',
+                '/api/stats',
+                '/api/search?q=incendie',
+                '/api/search?q=conseil%20municipal&limit=100',
+                '/api/sources/health',
+                '/metrics'
+            ]
+            resultats['routes'] = bench_routes(app, routes, args.requests, args.concurrency)
+    finally:
+        restore_sources(app, urls)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Remplissage de la base avec des articles synthétiques (10k à 10M lignes)
+
+Utilise SQLite (pqr_articles.db dans le répertoire courant) ou la base
+PostgreSQL de benchmark passée avec --database-url (ou BENCH_DATABASE_URL).
+DATABASE_URL, qui désigne la base de l'application, n'est jamais utilisée.
+
+    python bench/seed_db.py --rows 1000000 --days 365
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_server import WORDS
+
+def add_database_argument(parser):
+    """Option --database-url : base PostgreSQL dédiée aux benchmarks"""
+    parser.add_argument(
+        '--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+        help='base PostgreSQL de benchmark (BENCH_DATABASE_URL par défaut ; SQLite sinon)'
+    )
+
+def select_database(parser, args):
+    """Brancher les benchmarks sur leur propre base, avant l'import de db_utils
+
+    Les benchmarks ajoutent des articles synthétiques et modifient les URLs
+    des sources : ils refusent de tourner sur la base de l'application
+    (DATABASE_URL) sans base de benchmark explicite.
+    """
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    elif os.environ.get('DATABASE_URL'):
+        parser.error("DATABASE_URL est définie : passer --database-url (ou BENCH_DATABASE_URL) "
+                     "avec une base dédiée aux benchmarks")
+
+def _sources():
+    from sources_utils import sources_registry
+    return [source for region, source in sources_registry.tasks()]
+
+def seed(rows, days=365, batch=10000, seed=1):
+    """Insérer 'rows' articles répartis sur 'days' jours ; renvoie le débit (lignes/s)"""
+    from db_utils import USE_POSTGRES, connection, adapt_query, ensure_schema
+
+    ensure_schema()
+    rng = random.Random(seed)
+    sources = _sources()
+    now = datetime.now()
+    run = f'{int(time.time())}-{seed}'
+
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        values = []
+        for number in range(offset, min(offset + batch, rows)):
+            source = rng.choice(sources)
+            date = now - timedelta(seconds=rng.uniform(0, days * 86400))
+            url = f'https://seed.test/{run}/{number}'
+            values.append((
+                ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize(),
+                url,
+                url,
+                ' '.join(rng.choice(WORDS) for _ in range(30)),
+                date,
+                date,
+                source['id'],
+                source['region_id']
+            ))
+        with connection() as conn:
+            cursor = conn.cursor()
+            if USE_POSTGRES:
+                from psycopg2.extras import execute_values
+                execute_values(cursor, '''
+                    INSERT INTO articles (titre, url, url_canonique, description, date_publication, date_collecte, source_id, region_id)
+                    VALUES %s ON CONFLICT DO NOTHING
+                ''', values, page_size=1000)
+            else:
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO articles (titre, url, url_canonique, description, date_publication, date_collecte, source_id, region_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', values)
+        print(f"\r{min(offset + batch, rows)}/{rows} articles", end='', file=sys.stderr)
+    print(file=sys.stderr)
+
+    # Recalculer les compteurs par source
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM stats_sources')
+        cursor.execute(adapt_query('''
+            INSERT INTO stats_sources (source, region, nb_articles)
+            SELECT s.nom, r.nom, COUNT(*)
+            FROM articles a
+            JOIN sources s ON s.id = a.source_id
+            JOIN regions r ON r.id = a.region_id
+            GROUP BY s.nom, r.nom
+        '''))
+
+    duration = time.perf_counter() - start
+    return {'lignes': rows, 'duree_s': round(duration, 3), 'lignes_par_s': round(rows / duration, 1) if duration else None}
+
+def main():
+    parser = argparse.ArgumentParser(description='Remplir la base avec des articles synthétiques')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365, help='période couverte par les dates de publication')
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    add_database_argument(parser)
+    args = parser.parse_args()
+    select_database(parser, args)
+    print(seed(args.rows, args.days, args.batch, args.seed))
+
+if __name__ == '__main__':
+    main()
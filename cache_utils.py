@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response, current_app
+
+from db_utils import get_data_version
+from sources_utils import sources_registry
+from response_utils import (
+    ArticlePage, article_page_response, negotiate_encoding, content_encoding, compress, COMPRESS_MIN_SIZE
+)
+
+# Configuration du cache de réponses
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 300))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 256))
+# Intervalle de relecture de la version des données (collecte dans un autre processus)
+CACHE_GENERATION_CHECK = float(os.environ.get('CACHE_GENERATION_CHECK', 5))
+
+class ResponseCache:
+    """Cache LRU de réponses avec durée de vie et numéro de génération
+
+    La génération correspond à la version des données en base : dès qu'une
+    écriture modifie les articles, les entrées des générations précédentes ne
+    sont plus servies. Une collecte sans nouvel article ne la change pas.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_date = None
+        self._generation_checked = 0
+
+    def _refresh_generation(self):
+        """Relire la version des données si la génération connue est trop ancienne"""
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_checked > CACHE_GENERATION_CHECK:
+            version, modified = get_data_version()
+            with self._lock:
+                self._generation = version
+                self._generation_date = datetime.fromtimestamp(modified, timezone.utc) if modified else None
+                self._generation_checked = now
+
+    def generation(self):
+        """Obtenir la génération courante (version des données)"""
+        self._refresh_generation()
+        return self._generation
+
+    def last_modified(self):
+        """Obtenir la date de la dernière modification des données (UTC)"""
+        self._refresh_generation()
+        return self._generation_date
+
+    def get(self, key):
+        """Lire une entrée si elle est encore valide"""
+        generation = self.generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['generation'] != generation or entry['expires'] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry['value']
+
+    def set(self, key, value):
+        """Enregistrer une entrée pour la génération courante"""
+        generation = self.generation()
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'generation': generation,
+                'expires': time.monotonic() + self.ttl
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Vider le cache et relire la génération à la prochaine requête"""
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+response_cache = ResponseCache()
+
+def cached_response(view):
+    """Mettre en cache la réponse JSON d'une route, par chemin et paramètres
+
+    La variante compressée (gzip / br) est gardée à côté de la réponse brute :
+    elle n'est compressée qu'une fois par génération. Pour une page d'articles
+    produite au fil de l'eau, seuls les articles sont gardés et la réponse est
+    de nouveau produite au fil de l'eau à chaque lecture.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Version du registre dans la clé : une réponse construite avec un
+        # registre pas encore rechargé n'est plus servie une fois qu'il l'est
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), sources_registry.version())
+        encoding = negotiate_encoding()
+
+        cached = response_cache.get((key, encoding)) if encoding else None
+        if cached is None:
+            cached = response_cache.get((key, None))
+            if cached is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                page = getattr(response, 'page', None)
+                if page is not None:
+                    response_cache.set((key, None), page)
+                    return response
+                cached = (response.get_data(), response.mimetype)
+                response_cache.set((key, None), cached)
+
+            if isinstance(cached, ArticlePage):
+                return article_page_response(cached.articles, cached.fields, **cached.extra)
+
+            body, mimetype = cached
+            if encoding and len(body) >= COMPRESS_MIN_SIZE:
+                cached = (compress(body, encoding), mimetype)
+                response_cache.set((key, encoding), cached)
+            else:
+                encoding = None
+
+        body, mimetype = cached
+        response = current_app.response_class(body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    return wrapper
+
+def conditional_response(view):
+    """Ajouter ETag / Last-Modified à une route et répondre 304 si rien n'a changé
+
+    L'ETag dépend uniquement de la version des données et du registre des
+    sources chargé, des paramètres et, si la réponse est compressée, de
+    l'encodage : un client à jour reçoit un 304 sans que la réponse soit
+    reconstruite ni lue depuis le cache, y compris après une collecte sans
+    nouvel article.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        generation = response_cache.generation()
+        params = sorted(request.args.items(multi=True))
+        sources = sources_registry.version()
+        etag = hashlib.sha1(f'{generation}:{sources}:{request.path}:{params}'.encode('utf-8')).hexdigest()[:24]
+        # Une représentation compressée a son propre ETag ; une petite réponse
+        # envoyée telle quelle garde le même ETag quel que soit Accept-Encoding
+        encoding = negotiate_encoding()
+        etags = [etag, f'{etag}-{encoding}'] if encoding else [etag]
+        last_modified = response_cache.last_modified()
+
+        matched = next((tag for tag in etags if request.if_none_match.contains(tag)), None)
+        not_modified = matched is not None
+        if not request.if_none_match and request.if_modified_since and last_modified:
+            not_modified = last_modified.replace(microsecond=0) <= request.if_modified_since
+
+        if not_modified:
+            response = current_app.response_class(status=304)
+            if matched:
+                response.set_etag(matched)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            sent_encoding = content_encoding(response, encoding)
+            response.set_etag(f'{etag}-{sent_encoding}' if sent_encoding else etag)
+
+        if last_modified:
+            response.last_modified = last_modified
+        # Le navigateur garde la réponse mais la revalide à chaque appel
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
@@ -2,95 +2,1585 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sqlite3
-import psycopg2
 import json
-from datetime import datetime
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 DATABASE_URL = os.environ.get('DATABASE_URL')
 USE_POSTGRES = bool(DATABASE_URL)
 
+if USE_POSTGRES:
+    # PostgreSQL sur Render
+    from psycopg2.extras import execute_values
+    from psycopg2.pool import ThreadedConnectionPool
+    DATABASE = DATABASE_URL
+else:
+    # SQLite en local
+    DATABASE = 'pqr_articles.db'
+
+# Taille du pool de connexions PostgreSQL (par processus)
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+
+# Recherche : nombre de jours au bout duquel le score de pertinence est divisé par deux
+SEARCH_RECENCY_DAYS = float(os.environ.get('SEARCH_RECENCY_DAYS', 7))
+
+# Nombre maximum de paramètres par requête SQLite (limite historique de 999)
+SQLITE_MAX_PARAMS = 900
+
+# Réglages appliqués à chaque connexion SQLite : journal WAL (les lectures ne
+# sont plus bloquées par les écritures), lecture par mmap, cache de pages et
+# attente d'un verrou plutôt qu'une erreur « database is locked »
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_KB = int(os.environ.get('SQLITE_CACHE_KB', 16 * 1024))
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 10))
+# Attente maximum (s) du verrou d'initialisation de la base (autre processus en cours de migration)
+SCHEMA_LOCK_TIMEOUT = float(os.environ.get('SCHEMA_LOCK_TIMEOUT', 300))
+# Attente maximum (s) d'une écriture confiée au thread d'écriture
+SQLITE_WRITE_TIMEOUT = float(os.environ.get('SQLITE_WRITE_TIMEOUT', 120))
+
+# Quasi-doublons : nombre de bits d'écart maximum entre deux empreintes SimHash
+# et fenêtre (en jours de publication) dans laquelle on cherche l'original
+SIMHASH_MAX_DISTANCE = min(int(os.environ.get('SIMHASH_MAX_DISTANCE', 6)), 7)
+DUPLICATE_WINDOW_DAYS = float(os.environ.get('DUPLICATE_WINDOW_DAYS', 3))
+# Découpage des empreintes dans l'index (8 bandes de 8 bits) : ne pas modifier
+# sans vider la table empreintes_bandes
+SIMHASH_BANDS = 8
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_local = threading.local()
+
+def _get_pool():
+    """Obtenir le pool PostgreSQL du processus courant (recréé après un fork)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DATABASE)
+            _pool_pid = os.getpid()
+        return _pool
+
 def get_connection():
-    """Obtenir une connexion à la base de données"""
+    """Obtenir une connexion à la base de données
+    
+    PostgreSQL : connexion empruntée au pool, à rendre avec release_connection().
+    SQLite : connexion propre au thread courant, réutilisée d'un appel à l'autre.
+    """
     if USE_POSTGRES:
-        return psycopg2.connect(DATABASE_URL)
-    else:
-        return sqlite3.connect('pqr_articles.db')
+        # Attendre une place libre plutôt que de faire échouer getconn()
+        _pool_slots.acquire()
+        try:
+            return _get_pool().getconn()
+        except Exception:
+            _pool_slots.release()
+            raise
+    
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        conn = open_sqlite()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+def open_sqlite():
+    """Ouvrir une connexion SQLite avec les réglages de production"""
+    conn = sqlite3.connect(DATABASE, timeout=SQLITE_BUSY_TIMEOUT)
+    # Avant le passage en WAL, qui fige la base : sans effet sur une base existante
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA mmap_size = {SQLITE_MMAP_SIZE}')
+    conn.execute(f'PRAGMA cache_size = {-SQLITE_CACHE_KB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+def release_connection(conn):
+    """Rendre une connexion obtenue avec get_connection()"""
+    if USE_POSTGRES:
+        try:
+            _get_pool().putconn(conn, close=bool(conn.closed))
+        finally:
+            _pool_slots.release()
+
+@contextmanager
+def connection():
+    """Connexion transactionnelle : commit en sortie, rollback sur erreur"""
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+class SQLiteWriter:
+    """Thread d'écriture SQLite unique du processus
+
+    Les écritures d'articles lui sont confiées et s'exécutent l'une après
+    l'autre sur sa propre connexion, chacune dans une transaction : elles ne
+    se disputent plus le verrou d'écriture, et les lectures (journal WAL)
+    continuent pendant ce temps sur les connexions des autres threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    def _start(self):
+        """Démarrer le thread s'il n'existe pas (à appeler sous self._lock)"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name='sqlite-writer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+        return self._queue
+
+    @staticmethod
+    def _discard(conn):
+        """Annuler la transaction en cours ; fermer la connexion si c'est impossible"""
+        if conn is None:
+            return None
+        try:
+            conn.rollback()
+            return conn
+        except Exception as e:
+            logger.error(f"Connexion d'écriture SQLite abandonnée: {e}")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return None
+
+    def _run(self, tasks):
+        conn = None
+        try:
+            while True:
+                func, args, future = tasks.get()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    # (Ré)ouverte au besoin : un échec (base verrouillée pendant
+                    # un VACUUM...) ne fait échouer que l'écriture en cours
+                    if conn is None:
+                        conn = open_sqlite()
+                    cursor = conn.cursor()
+                    cursor.execute('BEGIN IMMEDIATE')
+                    result = func(cursor, *args)
+                    conn.commit()
+                except BaseException as e:
+                    conn = self._discard(conn)
+                    future.set_exception(e)
+                    if not isinstance(e, Exception):
+                        raise
+                else:
+                    future.set_result(result)
+        finally:
+            # Arrêt inattendu : les écritures en attente échouent au lieu d'attendre
+            with self._lock:
+                if self._queue is tasks:
+                    self._thread = None
+                    self._queue = None
+            while True:
+                try:
+                    func, args, future = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(RuntimeError("Thread d'écriture SQLite arrêté"))
+
+    def run(self, func, *args):
+        """Exécuter func(cursor, *args) dans le thread d'écriture et attendre son résultat
+
+        TimeoutError si l'écriture n'a pas commencé après SQLITE_WRITE_TIMEOUT
+        secondes : elle est alors annulée et rien n'est écrit. Une écriture déjà
+        commencée ne peut pas être interrompue : on attend son issue, pour que
+        l'appelant sache si elle a été validée.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Écriture imbriquée dans le thread d'écriture")
+        future = Future()
+        with self._lock:
+            self._start().put((func, args, future))
+        try:
+            return future.result(timeout=SQLITE_WRITE_TIMEOUT)
+        except FuturesTimeoutError:
+            if future.cancel():
+                raise TimeoutError(f"Écriture SQLite non commencée après {SQLITE_WRITE_TIMEOUT:g}s")
+        logger.warning(f"Écriture SQLite en cours depuis plus de {SQLITE_WRITE_TIMEOUT:g}s, attente de sa fin")
+        return future.result()
+
+_writer = SQLiteWriter()
+
+def run_write(func, *args):
+    """Exécuter func(cursor, *args) dans une transaction d'écriture
+
+    SQLite : dans le thread d'écriture unique ; PostgreSQL : sur une
+    connexion du pool.
+    """
+    if USE_POSTGRES:
+        with connection() as conn:
+            return func(conn.cursor(), *args)
+    return _writer.run(func, *args)
+
+def adapt_query(query):
+    """Traduire les paramètres '?' dans le style du pilote (%s pour psycopg2)"""
+    if USE_POSTGRES:
+        return query.replace('%', '%%').replace('?', '%s')
+    return query
 
 def execute_query(query, params=None, fetch=False):
     """Exécuter une requête SQL"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(adapt_query(query), params or ())
+        
+        if fetch:
+            return cursor.fetchall()
+        return cursor.rowcount
+
+def fetch_all(query, params=None):
+    """Exécuter une requête de lecture et renvoyer toutes les lignes"""
+    return execute_query(query, params, fetch=True)
+
+def fetch_one(query, params=None):
+    """Exécuter une requête de lecture et renvoyer la première ligne"""
+    rows = execute_query(query, params, fetch=True)
+    return rows[0] if rows else None
+
+def init_database():
+    """Initialiser la base de données
     
-    try:
-        if params:
-            cursor.execute(query, params)
+    Tout se fait dans une seule transaction, sous un verrou exclusif : les
+    workers gunicorn démarrent ensemble et chacun vérifie les colonnes avant
+    de les ajouter ; le verrou couvre la vérification et la modification.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        
+        if USE_POSTGRES:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('pqr_init_database'))")
         else:
-            cursor.execute(query)
+            # Une migration (reconstruction de l'index plein texte...) peut
+            # durer plus que le délai d'attente d'un verrou SQLite
+            deadline = time.monotonic() + SCHEMA_LOCK_TIMEOUT
+            while True:
+                try:
+                    cursor.execute('BEGIN EXCLUSIVE')
+                    break
+                except sqlite3.OperationalError:
+                    if time.monotonic() > deadline:
+                        raise
+        
+        if USE_POSTGRES:
+            # PostgreSQL
+        
+            # Table des articles
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS articles (
+                    id SERIAL PRIMARY KEY,
+                    titre TEXT NOT NULL,
+                    url TEXT UNIQUE NOT NULL,
+                    description TEXT,
+                    source_id INTEGER NOT NULL,
+                    region_id INTEGER NOT NULL,
+                    date_publication TIMESTAMP,
+                    date_collecte TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+            # Table des collectes
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS collectes (
+                    id SERIAL PRIMARY KEY,
+                    date_collecte TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    nb_sources_total INTEGER,
+                    nb_sources_ok INTEGER,
+                    nb_articles_nouveaux INTEGER,
+                    details TEXT
+                )
+            ''')
+        
+            # Table des validateurs HTTP (ETag / Last-Modified) par flux
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS validateurs_flux (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    date_maj TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Compteurs d'articles par source, tenus à jour par la collecte
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stats_sources (
+                    source TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    nb_articles INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (source, region)
+                )
+            ''')
+            
+            # Verrous à durée limitée (élection du processus collecteur)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS verrous (
+                    nom TEXT PRIMARY KEY,
+                    proprietaire TEXT NOT NULL,
+                    expiration DOUBLE PRECISION NOT NULL
+                )
+            ''')
+            
+            # Versions des données servies (génération du cache et des ETag)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS versions (
+                    nom TEXT PRIMARY KEY,
+                    numero INTEGER NOT NULL,
+                    maj DOUBLE PRECISION NOT NULL
+                )
+            ''')
+            
+            # Planification adaptative des récupérations par source
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS planification_sources (
+                    url TEXT PRIMARY KEY,
+                    intervalle INTEGER NOT NULL,
+                    prochaine_collecte DOUBLE PRECISION NOT NULL,
+                    echecs INTEGER NOT NULL DEFAULT 0,
+                    derniere_collecte DOUBLE PRECISION
+                )
+            ''')
+            
+            # Historique des mesures de récupération par source
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS mesures_sources (
+                    id SERIAL PRIMARY KEY,
+                    date_mesure DOUBLE PRECISION NOT NULL,
+                    source TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    statut INTEGER,
+                    connexion_ms INTEGER,
+                    attente_ms INTEGER,
+                    telechargement_ms INTEGER,
+                    octets INTEGER,
+                    analyse_ms INTEGER,
+                    items INTEGER,
+                    nouveaux INTEGER,
+                    erreur TEXT
+                )
+            ''')
+        
+            # Tâches de collecte (manuelles et planifiées) et leur progression
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS taches_collecte (
+                    id TEXT PRIMARY KEY,
+                    origine TEXT NOT NULL,
+                    cle TEXT NOT NULL,
+                    cible TEXT NOT NULL,
+                    statut TEXT NOT NULL,
+                    debut DOUBLE PRECISION NOT NULL,
+                    maj DOUBLE PRECISION NOT NULL,
+                    fin DOUBLE PRECISION,
+                    progression TEXT,
+                    resultat TEXT,
+                    erreur TEXT
+                )
+            ''')
+        
+            # Index pour les performances
+            # (date_publication, id) : clé de pagination des listes d'articles
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_date_id ON articles(date_publication DESC, id DESC)')
+            cursor.execute('DROP INDEX IF EXISTS idx_articles_region')
+            cursor.execute('DROP INDEX IF EXISTS idx_articles_date')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_mesures_source ON mesures_sources(source, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_mesures_date ON mesures_sources(date_mesure)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_taches_cle ON taches_collecte(cle, debut)')
+            
+            # Quasi-doublons : empreinte SimHash, groupe (id de l'original) et
+            # index des empreintes découpées en bandes
+            cursor.execute('ALTER TABLE articles ADD COLUMN IF NOT EXISTS empreinte BIGINT')
+            cursor.execute('ALTER TABLE articles ADD COLUMN IF NOT EXISTS groupe_id INTEGER')
+            # Date de publication dans la clé : une recherche ne lit que les
+            # bandes de la fenêtre, pas celles de toute l'archive
+            cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = 'empreintes_bandes'")
+            band_columns = {row[0] for row in cursor.fetchall()}
+            if band_columns and 'date_publication' not in band_columns:
+                cursor.execute('DROP TABLE empreintes_bandes')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS empreintes_bandes (
+                    bande SMALLINT NOT NULL,
+                    valeur INTEGER NOT NULL,
+                    date_publication TIMESTAMP NOT NULL,
+                    article_id INTEGER NOT NULL,
+                    PRIMARY KEY (bande, valeur, date_publication, article_id)
+                )
+            ''')
+            
+            # Registre des régions et des sources (modifiable sans redéploiement)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS regions (
+                    id SERIAL PRIMARY KEY,
+                    nom TEXT UNIQUE NOT NULL,
+                    slug TEXT UNIQUE NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sources (
+                    id SERIAL PRIMARY KEY,
+                    nom TEXT UNIQUE NOT NULL,
+                    slug TEXT UNIQUE NOT NULL,
+                    region_id INTEGER NOT NULL REFERENCES regions(id),
+                    url TEXT NOT NULL,
+                    actif BOOLEAN NOT NULL DEFAULT TRUE,
+                    delai INTEGER,
+                    max_articles INTEGER,
+                    maj DOUBLE PRECISION NOT NULL
+                )
+            ''')
+            
+            # Source et région des articles, en entiers
+            cursor.execute('ALTER TABLE articles ADD COLUMN IF NOT EXISTS source_id INTEGER')
+            cursor.execute('ALTER TABLE articles ADD COLUMN IF NOT EXISTS region_id INTEGER')
+            
+            # Recherche plein texte : vecteur calculé par trigger (le nom de la
+            # source est lu dans la table sources) + index GIN
+            cursor.execute("""
+                SELECT is_generated FROM information_schema.columns
+                WHERE table_name = 'articles' AND column_name = 'recherche'
+            """)
+            row = cursor.fetchone()
+            if row and row[0] == 'ALWAYS':
+                # Ancienne colonne générée à partir de la colonne texte 'source'
+                cursor.execute('ALTER TABLE articles DROP COLUMN recherche')
+                row = None
+            cursor.execute('ALTER TABLE articles ADD COLUMN IF NOT EXISTS recherche tsvector')
+            cursor.execute('''
+                CREATE OR REPLACE FUNCTION articles_recherche() RETURNS trigger AS $$
+                BEGIN
+                    NEW.recherche :=
+                        setweight(to_tsvector('french', coalesce(NEW.titre, '')), 'A') ||
+                        setweight(to_tsvector('french', coalesce((SELECT nom FROM sources WHERE id = NEW.source_id), '')), 'B') ||
+                        setweight(to_tsvector('french', coalesce(NEW.description, '')), 'C');
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            ''')
+            cursor.execute('DROP TRIGGER IF EXISTS articles_recherche ON articles')
+            cursor.execute('''
+                CREATE TRIGGER articles_recherche
+                BEFORE INSERT OR UPDATE OF titre, description, source_id ON articles
+                FOR EACH ROW EXECUTE FUNCTION articles_recherche()
+            ''')
+            if row is None:
+                # Calculer le vecteur des articles déjà présents
+                cursor.execute('UPDATE articles SET titre = titre')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_recherche ON articles USING GIN(recherche)')
+            
+            # URL canonique : clé de dédoublonnage, 'url' garde le lien d'origine
+            cursor.execute('ALTER TABLE articles ADD COLUMN IF NOT EXISTS url_canonique TEXT')
         
-        if fetch:
-            result = cursor.fetchall()
         else:
-            result = cursor.rowcount
+            # SQLite
+            
+            # Libération progressive de l'espace après les purges (sans effet
+            # sur une base existante : voir compact_database())
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
         
-        conn.commit()
-        return result
+            # Table des articles
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    titre TEXT NOT NULL,
+                    url TEXT UNIQUE NOT NULL,
+                    description TEXT,
+                    source_id INTEGER NOT NULL,
+                    region_id INTEGER NOT NULL,
+                    date_publication DATETIME,
+                    date_collecte DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+            # Table des collectes
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS collectes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date_collecte DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    nb_sources_total INTEGER,
+                    nb_sources_ok INTEGER,
+                    nb_articles_nouveaux INTEGER,
+                    details TEXT
+                )
+            ''')
+        
+            # Table des validateurs HTTP (ETag / Last-Modified) par flux
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS validateurs_flux (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    date_maj DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Compteurs d'articles par source, tenus à jour par la collecte
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stats_sources (
+                    source TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    nb_articles INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (source, region)
+                )
+            ''')
+            
+            # Verrous à durée limitée (élection du processus collecteur)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS verrous (
+                    nom TEXT PRIMARY KEY,
+                    proprietaire TEXT NOT NULL,
+                    expiration REAL NOT NULL
+                )
+            ''')
+            
+            # Versions des données servies (génération du cache et des ETag)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS versions (
+                    nom TEXT PRIMARY KEY,
+                    numero INTEGER NOT NULL,
+                    maj REAL NOT NULL
+                )
+            ''')
+            
+            # Planification adaptative des récupérations par source
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS planification_sources (
+                    url TEXT PRIMARY KEY,
+                    intervalle INTEGER NOT NULL,
+                    prochaine_collecte REAL NOT NULL,
+                    echecs INTEGER NOT NULL DEFAULT 0,
+                    derniere_collecte REAL
+                )
+            ''')
+            
+            # Historique des mesures de récupération par source
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS mesures_sources (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date_mesure REAL NOT NULL,
+                    source TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    statut INTEGER,
+                    connexion_ms INTEGER,
+                    attente_ms INTEGER,
+                    telechargement_ms INTEGER,
+                    octets INTEGER,
+                    analyse_ms INTEGER,
+                    items INTEGER,
+                    nouveaux INTEGER,
+                    erreur TEXT
+                )
+            ''')
+        
+            # Tâches de collecte (manuelles et planifiées) et leur progression
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS taches_collecte (
+                    id TEXT PRIMARY KEY,
+                    origine TEXT NOT NULL,
+                    cle TEXT NOT NULL,
+                    cible TEXT NOT NULL,
+                    statut TEXT NOT NULL,
+                    debut REAL NOT NULL,
+                    maj REAL NOT NULL,
+                    fin REAL,
+                    progression TEXT,
+                    resultat TEXT,
+                    erreur TEXT
+                )
+            ''')
+        
+            # Index pour les performances
+            # (date_publication, id) : clé de pagination des listes d'articles
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_date_id ON articles(date_publication DESC, id DESC)')
+            cursor.execute('DROP INDEX IF EXISTS idx_articles_region')
+            cursor.execute('DROP INDEX IF EXISTS idx_articles_date')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_mesures_source ON mesures_sources(source, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_mesures_date ON mesures_sources(date_mesure)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_taches_cle ON taches_collecte(cle, debut)')
+            
+            # Quasi-doublons : empreinte SimHash, groupe (id de l'original) et
+            # index des empreintes découpées en bandes
+            cursor.execute('PRAGMA table_info(articles)')
+            columns = {row[1] for row in cursor.fetchall()}
+            if 'empreinte' not in columns:
+                cursor.execute('ALTER TABLE articles ADD COLUMN empreinte INTEGER')
+            if 'groupe_id' not in columns:
+                cursor.execute('ALTER TABLE articles ADD COLUMN groupe_id INTEGER')
+            # Date de publication dans la clé : une recherche ne lit que les
+            # bandes de la fenêtre, pas celles de toute l'archive
+            cursor.execute('PRAGMA table_info(empreintes_bandes)')
+            band_columns = {row[1] for row in cursor.fetchall()}
+            if band_columns and 'date_publication' not in band_columns:
+                cursor.execute('DROP TABLE empreintes_bandes')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS empreintes_bandes (
+                    bande INTEGER NOT NULL,
+                    valeur INTEGER NOT NULL,
+                    date_publication DATETIME NOT NULL,
+                    article_id INTEGER NOT NULL,
+                    PRIMARY KEY (bande, valeur, date_publication, article_id)
+                ) WITHOUT ROWID
+            ''')
+            
+            # Registre des régions et des sources (modifiable sans redéploiement)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS regions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nom TEXT UNIQUE NOT NULL,
+                    slug TEXT UNIQUE NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sources (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nom TEXT UNIQUE NOT NULL,
+                    slug TEXT UNIQUE NOT NULL,
+                    region_id INTEGER NOT NULL REFERENCES regions(id),
+                    url TEXT NOT NULL,
+                    actif BOOLEAN NOT NULL DEFAULT 1,
+                    delai INTEGER,
+                    max_articles INTEGER,
+                    maj REAL NOT NULL
+                )
+            ''')
+            
+            # Source et région des articles, en entiers
+            if 'source_id' not in columns:
+                cursor.execute('ALTER TABLE articles ADD COLUMN source_id INTEGER')
+            if 'region_id' not in columns:
+                cursor.execute('ALTER TABLE articles ADD COLUMN region_id INTEGER')
+            
+            # URL canonique : clé de dédoublonnage, 'url' garde le lien d'origine
+            if 'url_canonique' not in columns:
+                cursor.execute('ALTER TABLE articles ADD COLUMN url_canonique TEXT')
+            
+            # Recherche plein texte : index FTS5 sans accents, tenu à jour par
+            # triggers ; le nom de la source est lu dans la table sources
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'articles_fts'")
+            row = cursor.fetchone()
+            fts_exists = row is not None and 'articles_texte' in row[0]
+            if row is not None and not fts_exists:
+                # Ancien index sur la colonne texte 'source' de la table articles
+                for trigger in ('articles_fts_insert', 'articles_fts_delete', 'articles_fts_update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                cursor.execute('DROP TABLE articles_fts')
+            cursor.execute('''
+                CREATE VIEW IF NOT EXISTS articles_texte AS
+                SELECT a.id, a.titre, a.description, s.nom AS source
+                FROM articles a
+                LEFT JOIN sources s ON s.id = a.source_id
+            ''')
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                    titre, description, source,
+                    content='articles_texte',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                    INSERT INTO articles_fts (rowid, titre, description, source)
+                    VALUES (new.id, new.titre, new.description, (SELECT nom FROM sources WHERE id = new.source_id));
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, titre, description, source)
+                    VALUES ('delete', old.id, old.titre, old.description, (SELECT nom FROM sources WHERE id = old.source_id));
+                END
+            ''')
+            # Uniquement sur les colonnes indexées (pas lors du rattachement à un groupe)
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF titre, description, source_id ON articles BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, titre, description, source)
+                    VALUES ('delete', old.id, old.titre, old.description, (SELECT nom FROM sources WHERE id = old.source_id));
+                    INSERT INTO articles_fts (rowid, titre, description, source)
+                    VALUES (new.id, new.titre, new.description, (SELECT nom FROM sources WHERE id = new.source_id));
+                END
+            ''')
+            if not fts_exists:
+                # Indexer les articles déjà présents
+                cursor.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+        
+        # Suppression des empreintes avec les articles archivés
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_empreintes_article ON empreintes_bandes(article_id)')
+        
+        # Listes par région : index sur l'id de la région plutôt que sur son nom
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_region_id_date ON articles(region_id, date_publication DESC, id DESC)')
+        cursor.execute('DROP INDEX IF EXISTS idx_articles_region_date')
+        
+        # Bandes des articles récents, après la reconstruction de la table
+        if band_columns and 'date_publication' not in band_columns:
+            _rebuild_simhash_bands(cursor)
+        
+        # Un article par URL canonique (les articles antérieurs sont complétés)
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_url_canonique ON articles(url_canonique)')
+        _backfill_canonical_urls(cursor)
+        
+        # Initialiser les compteurs à partir des articles existants
+        cursor.execute('SELECT 1 FROM stats_sources LIMIT 1')
+        if cursor.fetchone() is None:
+            if 'source' in _table_columns(cursor, 'articles'):
+                cursor.execute('''
+                    INSERT INTO stats_sources (source, region, nb_articles)
+                    SELECT source, region, COUNT(*) FROM articles GROUP BY source, region
+                ''')
+            else:
+                cursor.execute('''
+                    INSERT INTO stats_sources (source, region, nb_articles)
+                    SELECT s.nom, r.nom, COUNT(*)
+                    FROM articles a
+                    JOIN sources s ON s.id = a.source_id
+                    JOIN regions r ON r.id = a.region_id
+                    GROUP BY s.nom, r.nom
+                ''')
+        
+        # Base antérieure au registre : les noms de source et de région
+        # deviennent des ids (dès que le registre est rempli, voir seed_sources)
+        cursor.execute('SELECT 1 FROM sources LIMIT 1')
+        if cursor.fetchone():
+            _normalize_articles(cursor)
+    
+    logger.info("Base de données initialisée")
 
-def save_articles_batch(articles):
-    """Sauvegarder plusieurs articles en une fois"""
-    if not articles:
+def _table_columns(cursor, table):
+    """Noms des colonnes d'une table"""
+    if USE_POSTGRES:
+        cursor.execute(adapt_query('SELECT column_name FROM information_schema.columns WHERE table_name = ?'), (table,))
+        return {row[0] for row in cursor.fetchall()}
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+def _normalize_articles(cursor):
+    """Rattacher les articles à leur source et à leur région par id, puis supprimer les colonnes texte
+
+    Une source absente du registre (retirée des sources par défaut) y est
+    ajoutée, désactivée, pour que ses articles gardent leur nom.
+    """
+    if 'source' not in _table_columns(cursor, 'articles'):
+        return
+    
+    cursor.execute('''
+        SELECT DISTINCT a.source, a.region FROM articles a
+        WHERE NOT EXISTS (SELECT 1 FROM sources s WHERE s.nom = a.source)
+    ''')
+    for nom, region in cursor.fetchall():
+        try:
+            _insert_source(cursor, {
+                'nom': nom, 'slug': slugify(nom), 'url': '', 'actif': False,
+                'region': region, 'region_slug': slugify(region)
+            })
+        except ValueError as e:
+            logger.warning(f"Source des anciens articles non enregistrée: {e}")
+    
+    cursor.execute('''
+        UPDATE articles SET
+            region_id = (SELECT id FROM regions WHERE regions.nom = articles.region),
+            source_id = (SELECT id FROM sources WHERE sources.nom = articles.source)
+        WHERE region_id IS NULL OR source_id IS NULL
+    ''')
+    rattaches = cursor.rowcount
+    cursor.execute('ALTER TABLE articles DROP COLUMN source')
+    cursor.execute('ALTER TABLE articles DROP COLUMN region')
+    logger.info(f"📚 {rattaches} articles rattachés à leur source ; colonnes texte source et région supprimées")
+
+def _rebuild_simhash_bands(cursor):
+    """Réindexer les empreintes des articles publiés dans la fenêtre de recherche des doublons"""
+    since = datetime.now() - timedelta(days=DUPLICATE_WINDOW_DAYS)
+    cursor.execute(adapt_query('''
+        SELECT id, empreinte, date_publication FROM articles
+        WHERE empreinte IS NOT NULL AND date_publication >= ?
+    '''), (since,))
+    rows = [
+        (bande, value, date_publication, article_id)
+        for article_id, empreinte, date_publication in cursor.fetchall()
+        for bande, value in _simhash_bands(empreinte)
+    ]
+    cursor.executemany(
+        adapt_query('INSERT INTO empreintes_bandes (bande, valeur, date_publication, article_id) VALUES (?, ?, ?, ?)'),
+        rows
+    )
+    logger.info(f"🧬 Index des empreintes reconstruit ({len(rows) // SIMHASH_BANDS} articles)")
+
+def _backfill_canonical_urls(cursor):
+    """Calculer l'URL canonique des articles enregistrés avant l'ajout de la colonne
+
+    Si plusieurs anciens articles ont la même URL canonique, seul le premier
+    la reçoit : les autres restent à NULL, que l'index UNIQUE accepte.
+    """
+    # Import local : dedup_utils importe ce module
+    from dedup_utils import canonical_url
+    
+    cursor.execute('SELECT id, url FROM articles WHERE url_canonique IS NULL ORDER BY id')
+    rows = cursor.fetchall()
+    updated = 0
+    for article_id, url in rows:
+        key = canonical_url(url)
+        cursor.execute(adapt_query('SELECT 1 FROM articles WHERE url_canonique = ?'), (key,))
+        if cursor.fetchone():
+            continue
+        cursor.execute(adapt_query('UPDATE articles SET url_canonique = ? WHERE id = ?'), (key, article_id))
+        updated += 1
+    if updated:
+        logger.info(f"🔗 URL canonique calculée pour {updated} articles existants")
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def ensure_schema():
+    """Initialiser la base une seule fois par processus, au premier besoin"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            init_database()
+            _schema_ready = True
+
+def acquire_lease(name, owner, ttl):
+    """Prendre ou prolonger un verrou nommé pour 'ttl' secondes
+    
+    Renvoie True si 'owner' détient le verrou (déjà à lui ou expiré).
+    """
+    now = time.time()
+    updated = execute_query('''
+        INSERT INTO verrous (nom, proprietaire, expiration)
+        VALUES (?, ?, ?)
+        ON CONFLICT (nom) DO UPDATE SET
+            proprietaire = excluded.proprietaire,
+            expiration = excluded.expiration
+        WHERE verrous.proprietaire = excluded.proprietaire OR verrous.expiration < ?
+    ''', (name, owner, now + ttl, now))
+    return updated > 0
+
+def release_lease(name, owner):
+    """Libérer un verrou détenu par 'owner'"""
+    execute_query('DELETE FROM verrous WHERE nom = ? AND proprietaire = ?', (name, owner))
+
+def load_feed_validators():
+    """Charger les validateurs HTTP (ETag / Last-Modified) de tous les flux"""
+    rows = fetch_all('SELECT url, etag, last_modified FROM validateurs_flux')
+    return {
+        row[0]: {'etag': row[1], 'last_modified': row[2]}
+        for row in rows
+    }
+
+def save_feed_validators(results):
+    """Enregistrer les validateurs HTTP renvoyés par les flux"""
+    rows = [
+        (result['url'], result['etag'], result['last_modified'])
+        for result in results
+        if result['ok'] and not result['non_modifie'] and (result['etag'] or result['last_modified'])
+    ]
+    if not rows:
+        return
+    
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(adapt_query('''
+            INSERT INTO validateurs_flux (url, etag, last_modified, date_maj)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                date_maj = excluded.date_maj
+        '''), rows)
+
+_SOURCE_COLUMNS = ('id', 'nom', 'slug', 'url', 'actif', 'delai', 'max_articles', 'region_id', 'region', 'region_slug')
+
+def load_sources():
+    """Charger toutes les sources (actives ou non) avec leur région, dans l'ordre d'ajout"""
+    rows = fetch_all('''
+        SELECT s.id, s.nom, s.slug, s.url, s.actif, s.delai, s.max_articles, r.id, r.nom, r.slug
+        FROM sources s
+        JOIN regions r ON r.id = s.region_id
+        ORDER BY r.id, s.id
+    ''')
+    sources = [dict(zip(_SOURCE_COLUMNS, row)) for row in rows]
+    for source in sources:
+        source['actif'] = bool(source['actif'])
+    return sources
+
+def get_sources_version():
+    """Version du registre des sources, incrémentée à chaque ajout ou modification (0 : jamais rempli)
+
+    Un compteur en base plutôt que la date de modification la plus récente :
+    il avance quelle que soit l'horloge du processus qui écrit.
+    """
+    row = fetch_one("SELECT numero FROM versions WHERE nom = 'sources'")
+    return row[0] if row else 0
+
+def _bump_version(cursor, nom):
+    """Incrémenter la version 'nom', dans la transaction qui modifie les données"""
+    cursor.execute(adapt_query('''
+        INSERT INTO versions (nom, numero, maj) VALUES (?, 1, ?)
+        ON CONFLICT (nom) DO UPDATE SET numero = versions.numero + 1, maj = excluded.maj
+    '''), (nom, time.time()))
+
+def get_data_version():
+    """Version des données servies et date de leur dernière modification (epoch)
+
+    Seules les écritures qui changent réellement les données font avancer la
+    version : une collecte sans nouvel article la laisse inchangée.
+    """
+    rows = fetch_all('SELECT nom, numero, maj FROM versions ORDER BY nom')
+    return tuple((row[0], row[1]) for row in rows), max((row[2] for row in rows), default=None)
+
+def slugify(nom):
+    """Identifiant d'URL d'une région ou d'une source ('Pays de la Loire' -> 'pays-de-la-loire')"""
+    return nom.strip().lower().replace(' ', '-').replace('\'', '')
+
+def _get_or_create_region(cursor, nom, slug):
+    cursor.execute(adapt_query('SELECT id FROM regions WHERE nom = ?'), (nom,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    cursor.execute(adapt_query('SELECT 1 FROM regions WHERE slug = ?'), (slug,))
+    if cursor.fetchone():
+        raise ValueError(f"Identifiant de région déjà utilisé: {slug}")
+    cursor.execute(adapt_query('INSERT INTO regions (nom, slug) VALUES (?, ?)'), (nom, slug))
+    cursor.execute(adapt_query('SELECT id FROM regions WHERE nom = ?'), (nom,))
+    return cursor.fetchone()[0]
+
+def _insert_source(cursor, source):
+    region_id = _get_or_create_region(cursor, source['region'], source['region_slug'])
+    cursor.execute(adapt_query('SELECT 1 FROM sources WHERE nom = ? OR slug = ?'), (source['nom'], source['slug']))
+    if cursor.fetchone():
+        raise ValueError(f"Source déjà enregistrée: {source['nom']}")
+    cursor.execute(adapt_query('''
+        INSERT INTO sources (nom, slug, region_id, url, actif, delai, max_articles, maj)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''), (
+        source['nom'], source['slug'], region_id, source['url'], source.get('actif', True),
+        source.get('delai'), source.get('max_articles'), time.time()
+    ))
+    _bump_version(cursor, 'sources')
+    cursor.execute(adapt_query('SELECT id FROM sources WHERE nom = ?'), (source['nom'],))
+    return cursor.fetchone()[0]
+
+def seed_sources(sources):
+    """Remplir le registre avec les sources par défaut s'il est vide
+
+    Les articles déjà en base sont rattachés à leur source et à leur région
+    (voir _normalize_articles) dans la même transaction. Renvoie le nombre
+    de sources ajoutées.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        # Plusieurs processus peuvent démarrer en même temps : un seul remplit
+        if USE_POSTGRES:
+            cursor.execute('LOCK TABLE sources IN EXCLUSIVE MODE')
+        else:
+            cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT 1 FROM sources LIMIT 1')
+        if cursor.fetchone():
+            # Registre rempli avant l'ajout de sa version : lui en donner une
+            cursor.execute("SELECT 1 FROM versions WHERE nom = 'sources'")
+            if cursor.fetchone() is None:
+                _bump_version(cursor, 'sources')
+            return 0
+        for source in sources:
+            _insert_source(cursor, source)
+        _normalize_articles(cursor)
+        logger.info(f"📚 {len(sources)} sources enregistrées")
+    return len(sources)
+
+def add_source(source):
+    """Ajouter une source (dictionnaire nom, slug, url, region, region_slug...) ; renvoie son id
+
+    ValueError si le nom ou l'identifiant est déjà pris.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        # Deux ajouts simultanés du même nom : le second voit le premier et
+        # lève ValueError au lieu de heurter la contrainte UNIQUE
+        if USE_POSTGRES:
+            cursor.execute('LOCK TABLE sources IN EXCLUSIVE MODE')
+        else:
+            cursor.execute('BEGIN IMMEDIATE')
+        return _insert_source(cursor, source)
+
+def update_source(source_id, **fields):
+    """Modifier une source (actif, url, delai, max_articles) ; False si elle n'existe pas"""
+    columns = [column for column in ('actif', 'url', 'delai', 'max_articles') if column in fields]
+    assignments = ''.join(f'{column} = ?, ' for column in columns)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            adapt_query(f'UPDATE sources SET {assignments}maj = ? WHERE id = ?'),
+            [fields[column] for column in columns] + [time.time(), source_id]
+        )
+        if cursor.rowcount == 0:
+            return False
+        _bump_version(cursor, 'sources')
+        return True
+
+_JOB_COLUMNS = ('id', 'origine', 'cle', 'cible', 'statut', 'debut', 'maj', 'fin', 'progression', 'resultat', 'erreur')
+_JOB_JSON_COLUMNS = ('cible', 'progression', 'resultat')
+
+def _job_from_row(row):
+    if row is None:
+        return None
+    job = dict(zip(_JOB_COLUMNS, row))
+    for column in _JOB_JSON_COLUMNS:
+        job[column] = json.loads(job[column]) if job[column] else None
+    return job
+
+def save_job(job):
+    """Créer ou mettre à jour une tâche de collecte (dictionnaire aux clés de _JOB_COLUMNS)"""
+    values = [
+        json.dumps(job[column], ensure_ascii=False) if column in _JOB_JSON_COLUMNS and job[column] is not None
+        else job[column]
+        for column in _JOB_COLUMNS
+    ]
+    execute_query(f'''
+        INSERT INTO taches_collecte ({', '.join(_JOB_COLUMNS)})
+        VALUES ({', '.join('?' * len(_JOB_COLUMNS))})
+        ON CONFLICT (id) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in _JOB_COLUMNS[1:])}
+    ''', values)
+
+def _abandon_stale_jobs(since):
+    """Marquer 'abandonnee' les tâches en cours ou en attente sans nouvelles depuis 'since' (epoch)
+
+    Le processus qui les exécutait s'est arrêté sans pouvoir les clore.
+    """
+    execute_query('''
+        UPDATE taches_collecte
+        SET statut = 'abandonnee', fin = maj, erreur = 'Tâche abandonnée : plus de nouvelles de la collecte'
+        WHERE statut IN ('en_cours', 'en_attente') AND maj < ?
+    ''', (since,))
+
+def get_job(job_id, since=None):
+    """Obtenir une tâche de collecte par son id
+
+    Avec 'since' (epoch), une tâche en cours ou en attente sans nouvelles
+    depuis cette date est renvoyée (et enregistrée) comme abandonnée.
+    """
+    job = _job_from_row(fetch_one(
+        f"SELECT {', '.join(_JOB_COLUMNS)} FROM taches_collecte WHERE id = ?", (job_id,)
+    ))
+    if job and since is not None and job['statut'] in ('en_cours', 'en_attente') and job['maj'] < since:
+        _abandon_stale_jobs(since)
+        return get_job(job_id)
+    return job
+
+def get_running_job(since):
+    """Obtenir la tâche en cours, les tâches sans nouvelles depuis 'since' (epoch) étant abandonnées"""
+    _abandon_stale_jobs(since)
+    return _job_from_row(fetch_one(f'''
+        SELECT {', '.join(_JOB_COLUMNS)} FROM taches_collecte
+        WHERE statut = 'en_cours'
+        ORDER BY debut DESC LIMIT 1
+    '''))
+
+def get_waiting_job(since):
+    """Obtenir la tâche en attente de la fin de la collecte en cours (voir get_running_job)"""
+    _abandon_stale_jobs(since)
+    return _job_from_row(fetch_one(f'''
+        SELECT {', '.join(_JOB_COLUMNS)} FROM taches_collecte
+        WHERE statut = 'en_attente'
+        ORDER BY debut LIMIT 1
+    '''))
+
+def get_last_job(cle, origine):
+    """Obtenir la dernière tâche lancée pour une cible et une origine"""
+    return _job_from_row(fetch_one(f'''
+        SELECT {', '.join(_JOB_COLUMNS)} FROM taches_collecte
+        WHERE cle = ? AND origine = ?
+        ORDER BY debut DESC LIMIT 1
+    ''', (cle, origine)))
+
+def load_poll_schedule():
+    """Charger la planification des récupérations, par URL de flux"""
+    rows = fetch_all('SELECT url, intervalle, prochaine_collecte, echecs FROM planification_sources')
+    return {
+        row[0]: {'intervalle': row[1], 'prochaine_collecte': row[2], 'echecs': row[3]}
+        for row in rows
+    }
+
+def save_poll_schedule(rows):
+    """Enregistrer (url, intervalle, prochaine_collecte, echecs, derniere_collecte)"""
+    if not rows:
+        return
+    
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(adapt_query('''
+            INSERT INTO planification_sources (url, intervalle, prochaine_collecte, echecs, derniere_collecte)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                intervalle = excluded.intervalle,
+                prochaine_collecte = excluded.prochaine_collecte,
+                echecs = excluded.echecs,
+                derniere_collecte = excluded.derniere_collecte
+        '''), rows)
+
+def get_publication_counts(since):
+    """Compter les articles publiés depuis 'since', par source"""
+    rows = fetch_all('''
+        SELECT s.nom, COUNT(*)
+        FROM articles a
+        JOIN sources s ON s.id = a.source_id
+        WHERE a.date_publication >= ?
+        GROUP BY s.nom
+    ''', (since,))
+    return {row[0]: row[1] for row in rows}
+
+def save_source_metrics(rows):
+    """Enregistrer des mesures de récupération (une ligne par source collectée)"""
+    if not rows:
+        return
+    
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(adapt_query('''
+            INSERT INTO mesures_sources
+            (date_mesure, source, region, statut, connexion_ms, attente_ms,
+             telechargement_ms, octets, analyse_ms, items, nouveaux, erreur)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''), rows)
+
+_METRIC_COLUMNS = [
+    'date_mesure', 'source', 'region', 'statut', 'connexion_ms', 'attente_ms',
+    'telechargement_ms', 'octets', 'analyse_ms', 'items', 'nouveaux', 'erreur'
+]
+
+def get_latest_source_metrics():
+    """Obtenir la dernière mesure de chaque source"""
+    rows = fetch_all(f'''
+        SELECT {', '.join(_METRIC_COLUMNS)}
+        FROM mesures_sources
+        WHERE id IN (SELECT MAX(id) FROM mesures_sources GROUP BY source)
+    ''')
+    return [dict(zip(_METRIC_COLUMNS, row)) for row in rows]
+
+def get_source_health(since):
+    """Agréger les mesures de chaque source depuis 'since' (timestamp)"""
+    columns = [
+        'source', 'region', 'recuperations', 'succes', 'non_modifiees',
+        'connexion_ms_moy', 'attente_ms_moy', 'telechargement_ms_moy', 'analyse_ms_moy',
+        'duree_ms_totale', 'octets_total', 'nouveaux_total', 'derniere_mesure'
+    ]
+    rows = fetch_all('''
+        SELECT source, region, COUNT(*),
+               SUM(CASE WHEN erreur IS NULL THEN 1 ELSE 0 END),
+               SUM(CASE WHEN statut = 304 THEN 1 ELSE 0 END),
+               AVG(connexion_ms), AVG(attente_ms), AVG(telechargement_ms), AVG(analyse_ms),
+               SUM(connexion_ms + attente_ms + telechargement_ms + analyse_ms),
+               SUM(octets), SUM(nouveaux), MAX(date_mesure)
+        FROM mesures_sources
+        WHERE date_mesure >= ?
+        GROUP BY source, region
+    ''', (since,))
+    return [dict(zip(columns, row)) for row in rows]
+
+def get_region_counts():
+    """Obtenir le nombre d'articles par région depuis les compteurs"""
+    rows = fetch_all('SELECT region, SUM(nb_articles) FROM stats_sources GROUP BY region')
+    return {row[0]: row[1] for row in rows}
+
+def get_article_totals():
+    """Obtenir le total d'articles, de sources actives et de régions couvertes"""
+    return fetch_one('''
+        SELECT COALESCE(SUM(nb_articles), 0), COUNT(DISTINCT source), COUNT(DISTINCT region)
+        FROM stats_sources
+        WHERE nb_articles > 0
+    ''')
+
+def get_articles_before(cutoff, limit):
+    """Obtenir les plus anciens articles publiés avant 'cutoff' (lot pour l'archivage)"""
+    return fetch_all('''
+        SELECT a.id, a.titre, a.url, a.description, s.nom, r.nom, a.date_publication, a.date_collecte, a.groupe_id
+        FROM articles a
+        LEFT JOIN sources s ON s.id = a.source_id
+        LEFT JOIN regions r ON r.id = a.region_id
+        WHERE a.date_publication < ?
+        ORDER BY a.date_publication, a.id
+        LIMIT ?
+    ''', (cutoff, limit))
+
+def delete_articles(rows):
+    """Supprimer des articles (lignes de get_articles_before) et leurs empreintes
+
+    Les compteurs par source sont décrémentés et la version des données
+    incrémentée dans la même transaction.
+    """
+    if not rows:
         return 0
     
-    conn = get_connection()
-    cursor = conn.cursor()
+    counts = {}
+    for row in rows:
+        key = (row[4], row[5])
+        counts[key] = counts.get(key, 0) + 1
+    ids = [(row[0],) for row in rows]
+    
+    def delete(cursor):
+        cursor.executemany(adapt_query('DELETE FROM empreintes_bandes WHERE article_id = ?'), ids)
+        cursor.executemany(adapt_query('DELETE FROM articles WHERE id = ?'), ids)
+        greatest = 'GREATEST' if USE_POSTGRES else 'MAX'
+        cursor.executemany(adapt_query(f'''
+            UPDATE stats_sources SET nb_articles = {greatest}(nb_articles - ?, 0)
+            WHERE source = ? AND region = ?
+        '''), [(count, source, region) for (source, region), count in counts.items()])
+        _bump_version(cursor, 'articles')
     
-    nouveaux = 0
+    run_write(delete)
+    return len(ids)
+
+def get_last_collection_date():
+    """Date (UTC) de la dernière collecte enregistrée, ou None"""
+    row = fetch_one('SELECT date_collecte FROM collectes ORDER BY id DESC LIMIT 1')
+    if not row or row[0] is None:
+        return None
+    value = row[0]
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def prune_history(before):
+    """Supprimer l'historique des collectes, mesures et tâches antérieur à 'before' (epoch)
+
+    La dernière collecte est toujours conservée (date affichée par /api/stats).
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(adapt_query('''
+            DELETE FROM collectes
+            WHERE date_collecte < ? AND id < (SELECT MAX(id) FROM collectes)
+        '''), (datetime.fromtimestamp(before, timezone.utc).replace(tzinfo=None),))
+        collectes = cursor.rowcount
+        cursor.execute(adapt_query('DELETE FROM mesures_sources WHERE date_mesure < ?'), (before,))
+        mesures = cursor.rowcount
+        cursor.execute(adapt_query("DELETE FROM taches_collecte WHERE debut < ? AND statut != 'en_cours'"), (before,))
+    return collectes, mesures
+
+def compact_database(pages=2000):
+    """Rendre au disque l'espace libéré par les suppressions (SQLite)
+
+    Une base créée avant le passage en auto_vacuum incrémental est convertie
+    une fois par un VACUUM complet ; ensuite seules 'pages' pages libres sont
+    rendues à chaque appel. PostgreSQL s'en charge seul (autovacuum).
+    """
+    if USE_POSTGRES:
+        return
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != 2:
+            logger.info("Conversion de la base en auto_vacuum incrémental (VACUUM complet)")
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.commit()
+            cursor.execute('VACUUM')
+        else:
+            cursor.execute(f'PRAGMA incremental_vacuum({int(pages)})')
+            cursor.fetchall()
+
+def get_recent_urls(limit):
+    """Obtenir les URLs canoniques des 'limit' derniers articles insérés, du plus ancien au plus récent"""
+    rows = fetch_all('SELECT url_canonique FROM articles WHERE url_canonique IS NOT NULL ORDER BY id DESC LIMIT ?', (limit,))
+    return [row[0] for row in reversed(rows)]
+
+def _increment_source_counts(cursor, articles):
+    """Incrémenter les compteurs par source avec les articles insérés"""
+    counts = {}
     for article in articles:
-        try:
-            if USE_POSTGRES:
-                cursor.execute('''
-                    INSERT INTO articles 
-                    (titre, url, description, source, region, date_publication)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (url) DO NOTHING
-                ''', (
-                    article['titre'],
-                    article['url'],
-                    article['description'],
-                    article['source'],
-                    article['region'],
-                    article['date_publication']
-                ))
-            else:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO articles 
-                    (titre, url, description, source, region, date_publication)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    article['titre'],
-                    article['url'],
-                    article['description'],
-                    article['source'],
-                    article['region'],
-                    article['date_publication']
-                ))
-            
-            if cursor.rowcount > 0:
-                nouveaux += 1
-                
-        except Exception as e:
-            print(f"Erreur sauvegarde article: {e}")
+        key = (article['source'], article['region'])
+        counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+    
+    cursor.executemany(adapt_query('''
+        INSERT INTO stats_sources (source, region, nb_articles)
+        VALUES (?, ?, ?)
+        ON CONFLICT (source, region) DO UPDATE SET
+            nb_articles = stats_sources.nb_articles + excluded.nb_articles
+    '''), [(source, region, count) for (source, region), count in counts.items()])
+
+# Article des listes et du flux (id en tête) ; LEFT JOIN : la lecture reste
+# pilotée par les index de la table articles
+_ARTICLE_SELECT = '''
+    SELECT a.id, a.titre, a.url, a.description, s.nom, r.nom, a.date_publication, a.date_collecte,
+           COALESCE(a.groupe_id, a.id)
+    FROM articles a
+    LEFT JOIN sources s ON s.id = a.source_id
+    LEFT JOIN regions r ON r.id = a.region_id
+'''
+
+def list_articles(region_id=None, limit=100, before=None):
+    """Lister les articles du plus récent au plus ancien
+    
+    Pagination par clé : 'before' est le couple (date_publication, id) du
+    dernier article de la page précédente. La lecture suit l'index
+    (date_publication, id), quelle que soit la profondeur de la page.
+    """
+    sql = _ARTICLE_SELECT
+    conditions = []
+    params = []
+    
+    if region_id:
+        conditions.append('a.region_id = ?')
+        params.append(region_id)
+    if before:
+        conditions.append('(a.date_publication, a.id) < (?, ?)')
+        params.extend(before)
+    
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY a.date_publication DESC, a.id DESC LIMIT ?'
+    params.append(limit)
+    
+    return fetch_all(sql, params)
+
+def get_articles_after(last_id, limit, region=None):
+    """Lister les articles insérés après l'id 'last_id', du plus ancien au plus récent"""
+    sql = _ARTICLE_SELECT + ' WHERE a.id > ?'
+    params = [last_id]
+    if region:
+        sql += ' AND r.nom = ?'
+        params.append(region)
+    sql += ' ORDER BY a.id LIMIT ?'
+    params.append(limit)
+    return fetch_all(sql, params)
+
+def get_last_article_id():
+    """Obtenir l'id du dernier article inséré (0 si la base est vide)"""
+    return fetch_one('SELECT MAX(id) FROM articles')[0] or 0
+
+def _search_terms(query):
+    """Découper une recherche en mots (lettres et chiffres uniquement)"""
+    return re.findall(r'\w+', query)
+
+def search_articles(query, region=None, limit=50):
+    """Rechercher des articles via l'index plein texte
+    
+    Les résultats sont classés par pertinence, pondérée par l'ancienneté de
+    l'article. Chaque mot est cherché en préfixe et tous doivent être présents.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+    
+    if USE_POSTGRES:
+        sql = '''
+            SELECT a.titre, a.url, a.description, s.nom, r.nom, a.date_publication, a.date_collecte,
+                   COALESCE(a.groupe_id, a.id)
+            FROM articles a
+            LEFT JOIN sources s ON s.id = a.source_id
+            LEFT JOIN regions r ON r.id = a.region_id
+            WHERE a.recherche @@ to_tsquery('french', ?)
+        '''
+        params = [' & '.join(f'{term}:*' for term in terms)]
+        if region:
+            sql += ' AND r.nom = ?'
+            params.append(region)
+        sql += '''
+            ORDER BY ts_rank_cd(a.recherche, to_tsquery('french', ?))
+                / (1 + EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - a.date_publication)) / 86400.0 / ?) DESC
+            LIMIT ?
+        '''
+        params += [params[0], SEARCH_RECENCY_DAYS, limit]
+    else:
+        sql = '''
+            SELECT a.titre, a.url, a.description, s.nom, r.nom, a.date_publication, a.date_collecte,
+                   COALESCE(a.groupe_id, a.id)
+            FROM articles_fts
+            JOIN articles a ON a.id = articles_fts.rowid
+            LEFT JOIN sources s ON s.id = a.source_id
+            LEFT JOIN regions r ON r.id = a.region_id
+            WHERE articles_fts MATCH ?
+        '''
+        params = [' '.join(f'"{term}"*' for term in terms)]
+        if region:
+            sql += ' AND r.nom = ?'
+            params.append(region)
+        # bm25 est négatif (plus petit = plus pertinent) : le diviser rapproche
+        # les articles anciens de zéro, donc les fait reculer
+        sql += '''
+            ORDER BY bm25(articles_fts, 10.0, 1.0, 5.0)
+                / (1 + MAX(julianday('now') - julianday(a.date_publication), 0) / ?)
+            LIMIT ?
+        '''
+        params += [SEARCH_RECENCY_DAYS, limit]
+    
+    return fetch_all(sql, params)
+
+def _reference_ids(cursor):
+    """Ids des sources et des régions, par nom"""
+    cursor.execute('SELECT nom, id FROM sources')
+    sources = dict(cursor.fetchall())
+    cursor.execute('SELECT nom, id FROM regions')
+    return sources, dict(cursor.fetchall())
+
+def _article_row(article, references):
+    """Convertir un article en tuple d'insertion"""
+    sources, regions = references
+    return (
+        article['titre'],
+        article['url'],
+        article['url_canonique'],
+        article['description'],
+        article['date_publication'],
+        article.get('empreinte'),
+        sources[article['source']],
+        regions[article['region']]
+    )
+
+def _simhash_bands(empreinte):
+    """Découper une empreinte 64 bits en SIMHASH_BANDS bandes (bande, valeur)
+
+    Deux empreintes distantes d'au plus SIMHASH_BANDS - 1 bits ont au moins
+    une bande identique : la recherche d'un quasi-doublon se limite aux
+    articles partageant une bande.
+    """
+    value = empreinte & 0xFFFFFFFFFFFFFFFF
+    width = 64 // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [(bande, value >> (width * bande) & mask) for bande in range(SIMHASH_BANDS)]
+
+def _assign_groups(cursor, articles):
+    """Rattacher les articles insérés (avec 'id') au groupe d'un quasi-doublon récent
+
+    groupe_id vaut l'id du premier article du groupe ; il reste NULL pour
+    l'original. Les empreintes sont indexées au fil de l'eau, ce qui permet
+    de regrouper aussi les reprises arrivées dans le même lot.
+    """
+    for article in sorted(articles, key=lambda article: article['id']):
+        empreinte = article.get('empreinte')
+        article['groupe_id'] = None
+        if empreinte is None:
             continue
+        
+        # Sans date de publication, l'article ne peut pas être dans la fenêtre d'un autre
+        date_publication = article['date_publication']
+        if date_publication is None:
+            continue
+        
+        bands = _simhash_bands(empreinte)
+        since = date_publication - timedelta(days=DUPLICATE_WINDOW_DAYS)
+        # La borne de date dans chaque terme permet un parcours de l'index
+        # (bande, valeur, date_publication) limité à la fenêtre
+        cursor.execute(adapt_query(f'''
+            SELECT a.id, a.groupe_id, a.empreinte
+            FROM empreintes_bandes b
+            JOIN articles a ON a.id = b.article_id
+            WHERE {' OR '.join(['(b.bande = ? AND b.valeur = ? AND b.date_publication >= ?)'] * len(bands))}
+            ORDER BY a.id
+        '''), [value for bande, valeur in bands for value in (bande, valeur, since)])
+        
+        for candidate_id, candidate_group, candidate_empreinte in cursor.fetchall():
+            distance = bin((empreinte ^ candidate_empreinte) & 0xFFFFFFFFFFFFFFFF).count('1')
+            if distance <= SIMHASH_MAX_DISTANCE:
+                article['groupe_id'] = candidate_group or candidate_id
+                cursor.execute(
+                    adapt_query('UPDATE articles SET groupe_id = ? WHERE id = ?'),
+                    (article['groupe_id'], article['id'])
+                )
+                break
+        
+        cursor.executemany(
+            adapt_query('INSERT INTO empreintes_bandes (bande, valeur, date_publication, article_id) VALUES (?, ?, ?, ?)'),
+            [(bande, value, date_publication, article['id']) for bande, value in bands]
+        )
+
+def _insert_articles(cursor, articles):
+    """Insérer des articles (URLs canoniques uniques) ; renvoie ceux qui étaient nouveaux, avec 'id' et 'groupe_id'"""
+    references = _reference_ids(cursor)
+    sources, regions = references
+    inconnus = {article['source'] for article in articles
+                if article['source'] not in sources or article['region'] not in regions}
+    if inconnus:
+        logger.error(f"❌ Source ou région absente du registre, articles ignorés: {', '.join(sorted(inconnus))}")
+        articles = [article for article in articles if article['source'] not in inconnus]
     
-    conn.commit()
-    conn.close()
+    if USE_POSTGRES:
+        inserted = execute_values(cursor, '''
+            INSERT INTO articles
+            (titre, url, url_canonique, description, date_publication, empreinte, source_id, region_id)
+            VALUES %s
+            ON CONFLICT DO NOTHING
+            RETURNING id, url_canonique
+        ''', [_article_row(article, references) for article in articles], page_size=1000, fetch=True)
+        ids = {row[1]: row[0] for row in inserted}
+    else:
+        # La transaction (BEGIN IMMEDIATE) prend le verrou d'écriture dès le
+        # début : la vérification des URLs existantes reste exacte jusqu'au commit
+        by_key = {article['url_canonique']: article for article in articles}
+        keys = list(by_key)
+        existing = set()
+        for i in range(0, len(keys), SQLITE_MAX_PARAMS):
+            chunk = keys[i:i + SQLITE_MAX_PARAMS]
+            cursor.execute(
+                f"SELECT url_canonique FROM articles WHERE url_canonique IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            existing.update(row[0] for row in cursor.fetchall())
+        
+        new_keys = [key for key in keys if key not in existing]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO articles
+            (titre, url, url_canonique, description, date_publication, empreinte, source_id, region_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [_article_row(by_key[key], references) for key in new_keys])
+        
+        ids = {}
+        for i in range(0, len(new_keys), SQLITE_MAX_PARAMS):
+            chunk = new_keys[i:i + SQLITE_MAX_PARAMS]
+            cursor.execute(
+                f"SELECT url_canonique, id FROM articles WHERE url_canonique IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            ids.update(cursor.fetchall())
     
+    nouveaux = [article for article in articles if article['url_canonique'] in ids]
+    for article in nouveaux:
+        article['id'] = ids[article['url_canonique']]
+    _assign_groups(cursor, nouveaux)
+    _increment_source_counts(cursor, nouveaux)
+    if nouveaux:
+        _bump_version(cursor, 'articles')
     return nouveaux
 
+def save_articles_batch(articles):
+    """Sauvegarder plusieurs articles en une seule écriture groupée
+    
+    Renvoie la liste des articles réellement insérés (ceux dont l'URL
+    canonique n'était pas encore en base), complétés de leur 'id' et 'groupe_id'.
+    Avec SQLite, l'écriture passe par le thread d'écriture unique.
+    """
+    if not articles:
+        return []
+    
+    # Dédoublonner le lot lui-même (un même lien peut venir de deux sources)
+    unique = {}
+    for article in articles:
+        unique.setdefault(article['url_canonique'], article)
+    
+    return run_write(_insert_articles, list(unique.values()))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from db_utils import get_recent_urls
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'URLs gardées en mémoire (les plus récentes)
+KNOWN_URLS_MAX = int(os.environ.get('KNOWN_URLS_MAX', 50000))
+
+_WORD = re.compile(r'\w+')
+
+# Paramètres de suivi retirés des URLs (campagnes, clics publicitaires)
+TRACKING_PARAMS = {'xtor', 'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ocid', '_ga'}
+TRACKING_PREFIXES = ('utm_', 'at_')
+
+# Nombre minimum de mots pour calculer une empreinte (les titres très courts
+# comme « Météo » ou « Résultats » se ressemblent sans être des doublons)
+SIMHASH_MIN_TOKENS = 5
+
+def canonical_url(url):
+    """URL canonique d'un article (clé de dédoublonnage, jamais affichée)
+
+    Schéma https, hôte en minuscules sans port par défaut, sans fragment ni
+    paramètres de suivi (utm_*, xtor, fbclid...) : les variantes d'un même
+    lien se confondent. Le lien d'origine reste celui qui est servi.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if scheme in ('http', 'https') and port in (80, 443):
+        netloc = netloc.rsplit(':', 1)[0]
+    if scheme == 'http':
+        scheme = 'https'
+    query = parts.query
+    params = parse_qsl(query, keep_blank_values=True)
+    kept = [
+        (key, value) for key, value in params
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    if len(kept) != len(params):
+        query = urlencode(kept)
+    return urlunsplit((scheme, netloc, parts.path, query, ''))
+
+def _tokens(text):
+    """Mots d'un texte, en minuscules et sans accents (nombres et mots de trois lettres ou plus)"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [word for word in _WORD.findall(text) if len(word) >= 3 or word.isdigit()]
+
+def simhash(text):
+    """Empreinte SimHash 64 bits d'un texte (entier signé, stockable en BIGINT)
+
+    Deux textes proches ont des empreintes qui ne diffèrent que de quelques
+    bits. Renvoie None si le texte est trop court pour être comparé.
+    """
+    tokens = _tokens(text)
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+    # Trigrammes de caractères : un mot ajouté ou modifié ne change que
+    # quelques-uns des nombreux traits d'un texte court
+    text = ' '.join(tokens)
+    counts = Counter(text[i:i + 3] for i in range(len(text) - 2))
+    weights = [0] * 64
+    for token, count in counts.items():
+        value = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += count if value >> bit & 1 else -count
+    fingerprint = sum(1 << bit for bit in range(64) if weights[bit] > 0)
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+def article_fingerprint(titre, description):
+    """Empreinte d'un article, calculée sur son titre et sa description"""
+    return simhash(f'{titre} {description or ""}')
+
+class KnownUrlSet:
+    """Ensemble borné (LRU) des URLs canoniques d'articles déjà en base
+
+    Chargé depuis la base à la première utilisation puis complété après
+    chaque écriture : les articles déjà connus sont écartés dès l'analyse du
+    flux, sans nettoyage ni aller-retour avec la base. Les URLs passées
+    doivent déjà être canoniques (voir canonical_url). Une URL absente de
+    l'ensemble n'est pas forcément nouvelle (elle a pu en sortir) : la
+    contrainte UNIQUE de la base reste l'arbitre final.
+    """
+
+    def __init__(self, max_entries=KNOWN_URLS_MAX):
+        self.max_entries = max_entries
+        self._urls = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        """Charger les URLs les plus récentes depuis la base (une seule fois)"""
+        with self._lock:
+            if self._loaded:
+                return
+            for url in get_recent_urls(self.max_entries):
+                self._urls[url] = None
+            self._loaded = True
+            logger.info(f"🔗 {len(self._urls)} URLs d'articles connues chargées")
+
+    def __contains__(self, url):
+        self.load()
+        with self._lock:
+            if url not in self._urls:
+                return False
+            self._urls.move_to_end(url)
+            return True
+
+    def __len__(self):
+        return len(self._urls)
+
+    def update(self, urls):
+        """Ajouter des URLs canoniques présentes en base"""
+        self.load()
+        with self._lock:
+            for url in urls:
+                self._urls[url] = None
+                self._urls.move_to_end(url)
+            while len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+
+    def clear(self):
+        """Vider l'ensemble ; il sera rechargé depuis la base à la prochaine utilisation"""
+        with self._lock:
+            self._urls.clear()
+            self._loaded = False
+
+known_urls = KnownUrlSet()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import html
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import XMLPullParser, ParseError
+import feedparser
+from feedparser.sanitizer import _sanitize_html
+
+from dedup_utils import canonical_url, article_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Limites de lecture d'un flux
+MAX_FEED_BYTES = int(os.environ.get('MAX_FEED_BYTES', 5 * 1024 * 1024))
+MAX_ITEMS_PER_SOURCE = int(os.environ.get('MAX_ITEMS_PER_SOURCE', 20))
+CHUNK_SIZE = 64 * 1024
+
+# Éléments d'un article : <item> (RSS 0.9x / 1.0 / 2.0) ou <entry> (Atom)
+ITEM_TAGS = ('item', 'entry')
+
+# Analyse des flux : 'thread' (dans le thread qui télécharge) ou 'process'
+# (pool de processus, pour ne pas disputer le GIL aux requêtes de l'API)
+PARSE_EXECUTOR = os.environ.get('PARSE_EXECUTOR', 'thread')
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', min(os.cpu_count() or 1, 4)))
+PARSE_TIMEOUT = 60
+
+# Espaces de noms des éléments d'un article : RSS 0.9x / 2.0 (aucun), RSS 1.0
+# et Atom. Les extensions (media:, itunes:...) sont ignorées, sauf le contenu
+# complet (content:encoded) et la date Dublin Core (dc:date).
+FEED_NAMESPACES = ('', 'http://purl.org/rss/1.0/', 'http://www.w3.org/2005/Atom', 'http://purl.org/atom/ns#')
+CONTENT_NAMESPACE = 'http://purl.org/rss/1.0/modules/content/'
+DC_NAMESPACE = 'http://purl.org/dc/elements/1.1/'
+
+# Longueur maximum des descriptions enregistrées
+DESCRIPTION_MAX_LENGTH = 300
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+_HTML_BLOCK = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_SPACES = re.compile(r'\s+')
+
+_parse_pool = None
+_parse_pool_pid = None
+_parse_pool_lock = threading.Lock()
+
+def _local_name(tag):
+    """Nom d'un élément sans son espace de noms"""
+    return tag.rsplit('}', 1)[-1]
+
+def _parse_date(value):
+    """Convertir une date RFC 822 ou ISO 8601 en struct_time UTC (comme feedparser)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc).timetuple()
+
+def _namespace(tag):
+    """Espace de noms d'un élément ('' s'il n'en a pas)"""
+    return tag[1:].split('}', 1)[0] if tag.startswith('{') else ''
+
+def _entry_from_element(element):
+    """Extraire d'un élément <item> / <entry> un dictionnaire au format feedparser
+
+    Seuls les éléments RSS / Atom sont lus (un <media:title> ne remplace pas
+    le titre) et la première valeur l'emporte.
+    """
+    entry = {}
+    permalink = None
+    for child in element:
+        name = _local_name(child.tag)
+        namespace = _namespace(child.tag)
+        text = (child.text or '').strip()
+
+        if namespace == CONTENT_NAMESPACE:
+            if name == 'encoded':
+                entry.setdefault('content', text)
+            continue
+        if namespace == DC_NAMESPACE:
+            if name == 'date':
+                entry.setdefault('published_parsed', _parse_date(text))
+            continue
+        if namespace not in FEED_NAMESPACES:
+            continue
+
+        if name == 'title':
+            entry.setdefault('title', text)
+        elif name == 'link':
+            # Atom : <link rel="alternate" href="..."/> ; RSS : <link>url</link>
+            href = child.get('href')
+            if href is None:
+                entry.setdefault('link', text)
+            elif child.get('rel', 'alternate') == 'alternate':
+                entry.setdefault('link', href)
+        elif name == 'guid':
+            # RSS 2.0 : un guid est un permalien sauf isPermaLink="false"
+            if child.get('isPermaLink', 'true').lower() == 'true' and text.startswith(('http://', 'https://')):
+                permalink = text
+        elif name in ('description', 'summary'):
+            entry.setdefault('summary', text)
+        elif name == 'content':
+            entry.setdefault('content', text)
+        elif name in ('pubDate', 'published', 'issued'):
+            entry.setdefault('published_parsed', _parse_date(text))
+        elif name in ('updated', 'modified'):
+            entry.setdefault('updated_parsed', _parse_date(text))
+
+    if not entry.get('link') and permalink:
+        entry['link'] = permalink
+    if not entry.get('summary') and entry.get('content'):
+        entry['summary'] = entry['content']
+    # Même nettoyage HTML que feedparser (balises et attributs dangereux retirés)
+    for key in ('title', 'summary', 'content'):
+        if '<' in entry.get(key, ''):
+            entry[key] = _sanitize_html(entry[key], 'utf-8', 'text/html')
+    return entry
+
+def parse_feed_stream(chunks, max_items=MAX_ITEMS_PER_SOURCE, max_bytes=MAX_FEED_BYTES):
+    """Lire et analyser un flux morceau par morceau
+
+    La lecture s'arrête dès que 'max_items' articles sont complets ou que
+    'max_bytes' octets ont été lus : le reste du flux n'est ni téléchargé ni
+    analysé. Si le XML est invalide (entités HTML non déclarées, balises mal
+    fermées...), ce qui a été lu est confié à feedparser, plus tolérant.
+
+    Renvoie (entries, stats) où stats contient 'octets', 'telechargement_s',
+    'analyse_s', 'tronque' et 'methode'.
+    """
+    parser = XMLPullParser(events=('end',))
+    entries = []
+    buffer = []
+    stats = {'octets': 0, 'telechargement_s': 0.0, 'analyse_s': 0.0, 'tronque': False, 'methode': 'flux'}
+    valid = True
+
+    chunks = iter(chunks)
+    while len(entries) < max_items:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        stats['telechargement_s'] += time.perf_counter() - start
+        if chunk is None:
+            break
+
+        if stats['octets'] + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - stats['octets']]
+            stats['tronque'] = True
+        stats['octets'] += len(chunk)
+        buffer.append(chunk)
+
+        if valid:
+            start = time.perf_counter()
+            try:
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    if _local_name(element.tag) in ITEM_TAGS:
+                        entries.append(_entry_from_element(element))
+                        element.clear()
+            except ParseError:
+                valid = False
+            stats['analyse_s'] += time.perf_counter() - start
+
+        if stats['tronque']:
+            logger.warning(f"Flux tronqué à {max_bytes} octets")
+            break
+
+    if valid and entries:
+        return entries[:max_items], stats
+
+    # XML invalide (ou aucun article reconnu) : lire la suite puis feedparser
+    if not stats['tronque'] and len(entries) < max_items:
+        start = time.perf_counter()
+        for chunk in chunks:
+            if stats['octets'] + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - stats['octets']]
+                stats['tronque'] = True
+            stats['octets'] += len(chunk)
+            buffer.append(chunk)
+            if stats['tronque']:
+                break
+        stats['telechargement_s'] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    feed = feedparser.parse(b''.join(buffer))
+    stats['analyse_s'] += time.perf_counter() - start
+    stats['methode'] = 'feedparser'
+    if feed.bozo and feed.bozo_exception:
+        stats['avertissement'] = str(feed.bozo_exception)
+    return feed.entries[:max_items], stats
+
+def clean_text(text, max_length=None):
+    """Texte brut d'un fragment HTML
+
+    Décode les entités HTML puis retire les balises (et le contenu des
+    <script> / <style>), jusqu'à ce que le texte ne change plus : une balise
+    échappée deux fois ('&amp;lt;script&amp;gt;') ne ressort pas active.
+    Réduit ensuite les blancs et tronque à 'max_length' caractères.
+    """
+    if not text:
+        return ''
+    while True:
+        previous = text
+        if '&' in text:
+            text = html.unescape(text)
+        if '<' in text:
+            text = _HTML_TAG.sub(' ', _HTML_BLOCK.sub(' ', text))
+        if text == previous:
+            break
+    text = _SPACES.sub(' ', text).strip()
+    if max_length and len(text) > max_length:
+        text = text[:max_length].rstrip() + '...'
+    return text
+
+def entry_date(entry, now):
+    """Date de publication d'une entrée en UTC (sans fuseau), bornée à 'now'
+
+    Les dates de feedparser et de _parse_date sont des struct_time UTC ; une
+    date absente ou invalide vaut 'now', une date future (fuseau mal déclaré
+    par la source) est ramenée à 'now'.
+    """
+    for key in ('published_parsed', 'updated_parsed'):
+        parsed = entry.get(key)
+        if parsed:
+            try:
+                return min(datetime(*parsed[:6]), now)
+            except (TypeError, ValueError):
+                continue
+    return now
+
+def normalize_entries(entries, source_name, region, known=None, now=None):
+    """Transformer un lot d'entrées analysées en articles prêts à enregistrer
+
+    Les entrées dont l'URL canonique est dans 'known' sont comptées mais pas
+    nettoyées. Fonction pure (hors 'known') : elle peut tourner dans un
+    processus séparé. Renvoie (articles, nombre d'entrées déjà connues).
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    articles = []
+    connus = 0
+    for entry in entries:
+        try:
+            link = (entry.get('link') or '').strip()
+            key = canonical_url(link)
+
+            # Article déjà en base : inutile de le nettoyer et de le réécrire
+            if link and known is not None and key in known:
+                connus += 1
+                continue
+
+            titre = clean_text(entry.get('title'))
+            if not titre or not link:
+                continue
+            description = clean_text(entry.get('summary') or entry.get('description'), DESCRIPTION_MAX_LENGTH)
+
+            articles.append({
+                'titre': titre,
+                'url': link,
+                'url_canonique': key,
+                'description': description,
+                'source': source_name,
+                'region': region,
+                'date_publication': entry_date(entry, now),
+                'empreinte': article_fingerprint(titre, description)
+            })
+        except Exception as e:
+            logger.error(f"Erreur normalisation article {source_name}: {e}")
+    return articles, connus
+
+def read_feed(chunks, max_bytes=MAX_FEED_BYTES):
+    """Télécharger un flux brut, borné à 'max_bytes' ; renvoie (data, stats)"""
+    stats = {'octets': 0, 'telechargement_s': 0.0, 'tronque': False}
+    buffer = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        if stats['octets'] + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - stats['octets']]
+            stats['tronque'] = True
+        stats['octets'] += len(chunk)
+        buffer.append(chunk)
+        if stats['tronque']:
+            logger.warning(f"Flux tronqué à {max_bytes} octets")
+            break
+    stats['telechargement_s'] = time.perf_counter() - start
+    return b''.join(buffer), stats
+
+def parse_feed_bytes(data, source_name, region, max_items=MAX_ITEMS_PER_SOURCE):
+    """Analyser et normaliser un flux brut (exécuté dans le pool de processus)
+
+    Renvoie (articles, stats) ; le filtrage des URLs déjà connues reste à
+    faire par l'appelant.
+    """
+    start = time.perf_counter()
+    chunks = (data[offset:offset + CHUNK_SIZE] for offset in range(0, len(data), CHUNK_SIZE))
+    entries, stats = parse_feed_stream(chunks, max_items, max_bytes=len(data))
+    articles, _ = normalize_entries(entries, source_name, region)
+    stats['items'] = len(entries)
+    stats['analyse_s'] = time.perf_counter() - start
+    return articles, stats
+
+def _get_parse_pool():
+    """Obtenir le pool de processus d'analyse (recréé après un fork)"""
+    global _parse_pool, _parse_pool_pid
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_pid != os.getpid():
+            # 'spawn' : pas de copie des verrous et connexions du processus web
+            _parse_pool = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            _parse_pool_pid = os.getpid()
+        return _parse_pool
+
+def _reset_parse_pool(pool):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+def parse_in_pool(data, source_name, region, max_items=MAX_ITEMS_PER_SOURCE):
+    """parse_feed_bytes() dans le pool de processus
+
+    Si le pool est hors d'usage (processus tué...), il est recréé à l'appel
+    suivant et le flux est analysé sur place.
+    """
+    pool = _get_parse_pool()
+    try:
+        return pool.submit(parse_feed_bytes, data, source_name, region, max_items).result(timeout=PARSE_TIMEOUT)
+    except BrokenProcessPool:
+        logger.error(f"Pool d'analyse hors d'usage, analyse sur place de {source_name}")
+        _reset_parse_pool(pool)
+        return parse_feed_bytes(data, source_name, region, max_items)
+
+def shutdown_parse_pool():
+    """Arrêter le pool de processus d'analyse"""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None and _parse_pool_pid == os.getpid():
+        pool.shutdown(wait=False, cancel_futures=True)
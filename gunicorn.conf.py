@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+"""Configuration Gunicorn (chargée automatiquement par `gunicorn app:app`)"""
+
+import os
+
+# Workers à threads : une connexion au flux /api/stream occupe un thread,
+# pas un worker entier (STREAM_MAX_CLIENTS borne ces connexions par worker)
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+def post_worker_init(worker):
+    """Démarrer le collecteur dans chaque worker : un seul sera élu via la base"""
+    if os.environ.get('COLLECTOR_MODE', 'embedded') == 'embedded':
+        from app import start_collector
+        start_collector()
+
+def worker_exit(server, worker):
+    """Libérer le verrou de collecteur pour qu'un autre worker prenne le relais"""
+    if os.environ.get('COLLECTOR_MODE', 'embedded') == 'embedded':
+        from app import stop_collector
+        stop_collector()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import brotli  # noqa: F401 - active le décodage br dans urllib3
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# Configuration du pool HTTP
+HTTP_POOL_HOSTS = int(os.environ.get('HTTP_POOL_HOSTS', 100))
+# Aligné sur la limite de requêtes simultanées par hôte de la collecte
+HTTP_POOL_PER_HOST = int(os.environ.get('COLLECT_PER_HOST', 4))
+
+# Fin de réponse lue après un flux tronqué pour garder la connexion keep-alive ;
+# au-delà, la connexion est fermée (moins coûteux que de tout télécharger)
+HTTP_DRAIN_MAX_BYTES = int(os.environ.get('HTTP_DRAIN_MAX_BYTES', 64 * 1024))
+
+# Headers pour éviter les blocages
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive'
+}
+
+# Temps passé à ouvrir des connexions (DNS + TCP + TLS), par thread
+_timings = threading.local()
+
+def reset_connect_time():
+    """Remettre à zéro le temps de connexion mesuré pour le thread courant"""
+    _timings.connect = 0.0
+
+def get_connect_time():
+    """Temps de connexion (secondes) cumulé depuis reset_connect_time()
+
+    Vaut 0 quand la requête a réutilisé une connexion keep-alive du pool.
+    """
+    return getattr(_timings, 'connect', 0.0)
+
+def _add_connect_time(elapsed):
+    _timings.connect = get_connect_time() + elapsed
+
+class TimedHTTPConnection(HTTPConnection):
+    """Connexion HTTP qui mesure la durée de son ouverture"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_connect_time(time.perf_counter() - start)
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """Connexion HTTPS qui mesure la durée de son ouverture (poignée de main TLS comprise)"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_connect_time(time.perf_counter() - start)
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adaptateur dont les pools utilisent les connexions instrumentées"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+# Les adaptateurs (et leurs pools de connexions urllib3) sont partagés par
+# toutes les sessions : les connexions keep-alive sont réutilisées d'un
+# thread à l'autre et d'une collecte à l'autre.
+_adapter = TimedHTTPAdapter(
+    pool_connections=HTTP_POOL_HOSTS,
+    pool_maxsize=HTTP_POOL_PER_HOST
+)
+
+_local = threading.local()
+
+def get_session():
+    """Obtenir la session HTTP du thread courant
+
+    Chaque thread possède sa propre session (cookies, headers), mais toutes
+    montent le même adaptateur et partagent donc le pool de connexions.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount('http://', _adapter)
+        session.mount('https://', _adapter)
+        _local.session = session
+    return session
+
+def drain_response(response, chunks, max_bytes=HTTP_DRAIN_MAX_BYTES):
+    """Lire la fin d'une réponse interrompue pour rendre sa connexion au pool
+
+    'chunks' est l'itérateur déjà entamé (response.iter_content). Si le reste
+    annoncé par Content-Length, ou lu, dépasse 'max_bytes', on s'arrête :
+    response.close() fermera alors la connexion. Renvoie True si la réponse
+    a été lue jusqu'au bout.
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and int(length) - response.raw.tell() > max_bytes:
+        return False
+    lus = 0
+    for chunk in chunks:
+        lus += len(chunk)
+        if lus > max_bytes:
+            return False
+    return True
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import uuid
+import logging
+import threading
+
+from db_utils import acquire_lease, release_lease, save_job, get_running_job, get_waiting_job, get_last_job
+
+logger = logging.getLogger(__name__)
+
+# Délai minimum entre deux collectes manuelles d'une même cible
+COLLECT_MIN_INTERVAL = int(os.environ.get('COLLECT_MIN_INTERVAL', 60))
+# Durée au-delà de laquelle une tâche sans nouvelles est considérée comme abandonnée
+COLLECT_JOB_TTL = int(os.environ.get('COLLECT_JOB_TTL', 15 * 60))
+# Verrou pris pendant toute collecte, quel que soit le processus qui la lance
+COLLECT_LEASE = 'collecte_active'
+# Fréquence maximum d'enregistrement de la progression en base
+PROGRESS_SAVE_INTERVAL = 1.0
+# Intervalle (s) entre deux tentatives d'une collecte en attente
+COLLECT_QUEUE_POLL = 2.0
+
+def job_target(region=None, source=None, due=False):
+    """Décrire la cible d'une collecte : tout, une région, une source ou les sources échues"""
+    if due:
+        return {'type': 'echues', 'region': None, 'source': None, 'cle': 'echues'}
+    if source:
+        return {'type': 'source', 'region': region, 'source': source, 'cle': f'source:{source}'}
+    if region:
+        return {'type': 'region', 'region': region, 'source': None, 'cle': f'region:{region}'}
+    return {'type': 'tout', 'region': None, 'source': None, 'cle': 'tout'}
+
+def covers(running, requested):
+    """La collecte 'running' couvre-t-elle la cible demandée ?"""
+    if running['type'] == 'tout':
+        return True
+    if running['type'] == 'region':
+        return requested['type'] in ('region', 'source') and requested['region'] == running['region']
+    return running['cle'] == requested['cle']
+
+class CollectJob:
+    """Tâche de collecte : état et progression par région, enregistrés en base
+
+    L'état est lisible depuis n'importe quel processus (GET /api/collect/<id>),
+    quel que soit le worker qui exécute la collecte.
+    """
+
+    def __init__(self, cible, tasks, origine):
+        self.tasks = tasks
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._saved = 0
+        self.data = {
+            'id': uuid.uuid4().hex[:12],
+            'origine': origine,
+            'cle': cible['cle'],
+            'cible': cible,
+            'statut': 'en_cours',
+            'debut': self.started,
+            'maj': self.started,
+            'fin': None,
+            'progression': {
+                'sources_total': len(tasks),
+                'sources_traitees': 0,
+                'regions': {}
+            },
+            'resultat': None,
+            'erreur': None
+        }
+        regions = self.data['progression']['regions']
+        for region, source in tasks:
+            regions.setdefault(region, {'sources_total': 0, 'sources_traitees': 0, 'sources_ok': 0, 'articles': 0})
+            regions[region]['sources_total'] += 1
+
+    @property
+    def id(self):
+        return self.data['id']
+
+    def save(self):
+        """Enregistrer l'état ; une tâche en cours prolonge aussi le verrou de collecte"""
+        with self._lock:
+            self.data['maj'] = time.time()
+            self._saved = self.data['maj']
+            save_job(self.data)
+        if self.data['statut'] == 'en_cours':
+            acquire_lease(COLLECT_LEASE, self.id, COLLECT_JOB_TTL)
+
+    def start(self):
+        """Passer une tâche en attente à l'état en cours (verrou de collecte déjà pris)"""
+        self.started = time.time()
+        self.data.update({'statut': 'en_cours', 'debut': self.started})
+        self.save()
+
+    def source_done(self, region, result):
+        """Compter une source récupérée (appelé depuis les threads de collecte)"""
+        with self._lock:
+            progression = self.data['progression']
+            progression['sources_traitees'] += 1
+            region_progress = progression['regions'][region]
+            region_progress['sources_traitees'] += 1
+            region_progress['sources_ok'] += int(result['ok'])
+            region_progress['articles'] += len(result['articles'])
+            due = time.time() - self._saved >= PROGRESS_SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def finish(self, resultat):
+        self.data.update({'statut': 'terminee', 'fin': time.time(), 'resultat': resultat})
+        self.save()
+
+    def fail(self, error):
+        self.data.update({'statut': 'echec', 'fin': time.time(), 'erreur': str(error)[:500]})
+        self.save()
+
+class CollectJobManager:
+    """Lancement des collectes en vol unique
+
+    Une seule collecte à la fois, tous processus confondus (verrou en base).
+    Une demande couverte par la collecte en cours la rejoint au lieu d'en
+    lancer une autre ; une demande manuelle plus large que la collecte en
+    cours (tout pendant une collecte des sources échues...) est mise en
+    attente et part dès qu'elle se termine. Les demandes manuelles répétées
+    sont limitées.
+    """
+
+    def __init__(self, runner):
+        # runner(tasks, job) exécute la collecte et renvoie son résumé
+        self.runner = runner
+
+    def submit(self, cible, tasks, origine='manuelle', wait=False):
+        """Demander une collecte
+
+        Renvoie (tâche, etat) avec etat parmi 'cree', 'rejoint' (collecte en
+        cours ou en attente qui couvre la cible), 'en_attente' (lancée après
+        la collecte en cours), 'occupe' (autre collecte en cours) et 'limite'
+        (collecte manuelle trop récente).
+        """
+        running = get_running_job(time.time() - COLLECT_JOB_TTL)
+        if running and covers(running['cible'], cible):
+            return running, 'rejoint'
+
+        if origine == 'manuelle':
+            last = get_last_job(cible['cle'], origine)
+            if last and last['fin'] and time.time() - last['fin'] < COLLECT_MIN_INTERVAL:
+                return last, 'limite'
+
+        if running:
+            if origine == 'manuelle':
+                # Une seule collecte en attente : elle est rejointe si elle couvre la cible
+                waiting = get_waiting_job(time.time() - COLLECT_JOB_TTL)
+                if waiting and covers(waiting['cible'], cible):
+                    return waiting, 'rejoint'
+                if not waiting and covers(cible, running['cible']):
+                    return self._enqueue(cible, tasks, origine)
+            return running, 'occupe'
+
+        job = CollectJob(cible, tasks, origine)
+        if not acquire_lease(COLLECT_LEASE, job.id, COLLECT_JOB_TTL):
+            # Une collecte vient de démarrer ailleurs
+            running = get_running_job(time.time() - COLLECT_JOB_TTL)
+            if running and covers(running['cible'], cible):
+                return running, 'rejoint'
+            return running, 'occupe'
+        job.save()
+
+        if wait:
+            self._run(job)
+        else:
+            threading.Thread(target=self._run, args=(job,), name=f'collect-{job.id}', daemon=True).start()
+        return job.data, 'cree'
+
+    def _enqueue(self, cible, tasks, origine):
+        """Mettre une collecte en attente de la fin de la collecte en cours"""
+        job = CollectJob(cible, tasks, origine)
+        job.data['statut'] = 'en_attente'
+        job.save()
+        threading.Thread(target=self._wait_and_run, args=(job,), name=f'collect-{job.id}', daemon=True).start()
+        return job.data, 'en_attente'
+
+    def _wait_and_run(self, job):
+        """Attendre le verrou de collecte (la tâche reste visible en attente), puis collecter"""
+        try:
+            while not acquire_lease(COLLECT_LEASE, job.id, COLLECT_JOB_TTL):
+                job.save()
+                time.sleep(COLLECT_QUEUE_POLL)
+            job.start()
+        except Exception as e:
+            logger.error(f"❌ Collecte {job.id} en attente abandonnée: {e}")
+            job.fail(e)
+            return
+        self._run(job)
+
+    def _run(self, job):
+        try:
+            job.finish(self.runner(job.tasks, job))
+        except Exception as e:
+            logger.error(f"❌ Collecte {job.id} en échec: {e}")
+            job.fail(e)
+        finally:
+            release_lease(COLLECT_LEASE, job.id)
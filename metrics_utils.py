@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Métriques par source au format texte Prometheus (sans dépendance externe)
+SOURCE_GAUGES = [
+    ('pqr_source_up', 'Dernière récupération réussie (1) ou en échec (0)', None),
+    ('pqr_source_http_status', 'Statut HTTP de la dernière récupération (0 si erreur réseau)', 'statut'),
+    ('pqr_source_connect_seconds', 'Durée d\'ouverture de connexion (DNS + TCP + TLS)', 'connexion_ms'),
+    ('pqr_source_wait_seconds', 'Attente de la réponse du serveur', 'attente_ms'),
+    ('pqr_source_download_seconds', 'Durée de téléchargement du flux', 'telechargement_ms'),
+    ('pqr_source_parse_seconds', 'Durée d\'analyse du flux', 'analyse_ms'),
+    ('pqr_source_bytes', 'Taille du flux téléchargé (octets)', 'octets'),
+    ('pqr_source_items', 'Nombre d\'éléments dans le flux', 'items'),
+    ('pqr_source_new_articles', 'Nouveaux articles lors de la dernière récupération', 'nouveaux'),
+    ('pqr_source_last_fetch_timestamp_seconds', 'Date de la dernière récupération', 'date_mesure')
+]
+
+def _escape(value):
+    """Échapper une valeur de label Prometheus"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _sample_value(metric, key, mesure):
+    """Valeur d'un échantillon, les durées étant converties en secondes"""
+    if key is None:
+        return 1 if mesure['erreur'] is None else 0
+    value = mesure[key] or 0
+    if key.endswith('_ms'):
+        return value / 1000.0
+    return value
+
+def format_prometheus(latest_metrics, totals):
+    """Construire l'exposition Prometheus à partir des dernières mesures par source
+
+    'totals' contient les valeurs globales (articles, sources, dernière collecte).
+    """
+    lines = []
+    for metric, help_text, key in SOURCE_GAUGES:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for mesure in latest_metrics:
+            labels = f'source="{_escape(mesure["source"])}",region="{_escape(mesure["region"])}"'
+            lines.append(f'{metric}{{{labels}}} {_sample_value(metric, key, mesure)}')
+
+    for metric, (help_text, value) in totals.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric} {value}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import zlib
+import gzip
+from collections import namedtuple
+from flask import request, current_app
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compression des réponses JSON
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+# Champs d'un article que le paramètre 'fields' peut sélectionner
+ARTICLE_FIELDS = ('titre', 'url', 'description', 'source', 'region', 'date_publication', 'date_collecte', 'doublons')
+
+# Contenu d'une page d'articles, gardé tel quel par le cache de réponses
+ArticlePage = namedtuple('ArticlePage', ['articles', 'fields', 'extra'])
+
+def _default(value):
+    """Dates au format ISO 8601, comme orjson"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def dumps(obj):
+    """Sérialiser en JSON (bytes), avec orjson s'il est installé"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+def parse_fields(value):
+    """Lire le paramètre 'fields' (ex. 'titre,url') ; ValueError si un champ est inconnu"""
+    if not value:
+        return None
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    unknown = [field for field in fields if field not in ARTICLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+    return fields or None
+
+def article_page_response(articles, fields=None, **extra):
+    """Réponse JSON {'articles': [...], **extra} produite article par article
+
+    Chaque article est sérialisé directement en bytes (sans passer par
+    jsonify) et envoyé au fil de l'eau ; 'fields' limite les champs renvoyés.
+    """
+    def generate():
+        yield b'{"articles":['
+        for index, article in enumerate(articles):
+            if fields:
+                article = {field: article[field] for field in fields}
+            yield (b',' if index else b'') + dumps(article)
+        yield b']'
+        for key, value in extra.items():
+            yield b',' + dumps(key) + b':' + dumps(value)
+        yield b'}'
+    response = current_app.response_class(generate(), mimetype='application/json')
+    # Le cache garde les articles plutôt que le corps, pour continuer à le produire au fil de l'eau
+    response.page = ArticlePage(articles, fields, extra)
+    return response
+
+def negotiate_encoding():
+    """Choisir l'encodage de la réponse d'après Accept-Encoding (None : pas de compression)"""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+def compress(data, encoding):
+    """Compresser un corps de réponse complet"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def iter_compress(chunks, encoding):
+    """Compresser un corps de réponse produit morceau par morceau"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+def content_encoding(response, encoding):
+    """Encodage avec lequel compress_response enverra la réponse (None : non compressée)
+
+    Les réponses produites au fil de l'eau sont toujours compressées ; les
+    autres seulement à partir de COMPRESS_MIN_SIZE octets.
+    """
+    if 'Content-Encoding' in response.headers:
+        return response.headers['Content-Encoding']
+    if encoding is None or response.mimetype != 'application/json' or response.status_code != 200:
+        return None
+    if not response.is_streamed and len(response.get_data()) < COMPRESS_MIN_SIZE:
+        return None
+    return encoding
+
+def compress_response(response):
+    """Compresser les réponses JSON selon Accept-Encoding (à brancher en after_request)
+
+    Les réponses déjà compressées (variantes tirées du cache) sont laissées
+    telles quelles ; les réponses produites au fil de l'eau sont compressées
+    au fil de l'eau.
+    """
+    if response.mimetype != 'application/json' or response.status_code != 200:
+        return response
+    response.vary.add('Accept-Encoding')
+    if 'Content-Encoding' in response.headers:
+        return response
+
+    encoding = content_encoding(response, negotiate_encoding())
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = iter_compress(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
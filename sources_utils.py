@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+import threading
+
+from db_utils import ensure_schema, load_sources, get_sources_version, seed_sources, slugify
+
+logger = logging.getLogger(__name__)
+
+# Délai (s) au bout duquel un processus vérifie si le registre a changé
+# (source ajoutée ou désactivée depuis un autre processus) : une seule
+# ligne lue dans la table versions
+SOURCES_REFRESH_INTERVAL = int(os.environ.get('SOURCES_REFRESH_INTERVAL', 5))
+
+# Sources par défaut (68), chargées dans la table sources au premier démarrage
+DEFAULT_SOURCES = {
+    'Auvergne-Rhône-Alpes': [
+        {'name': 'Le Dauphiné libéré', 'url': 'https://www.ledauphine.com/rss'},
+        {'name': 'Le Progrès', 'url': 'https://www.leprogres.fr/rss'},
+        {'name': 'La Montagne', 'url': 'https://www.lamontagne.fr/rss'},
+        {'name': 'L\'Éveil de la Haute-Loire', 'url': 'https://www.leveil.fr/rss'},
+        {'name': 'France Bleu Isère', 'url': 'https://www.francebleu.fr/rss/a-la-une/isere'},
+        {'name': 'Lyon Mag', 'url': 'https://www.lyonmag.com/rss.xml'}
+    ],
+    'Bourgogne-Franche-Comté': [
+        {'name': 'Le Journal de Saône-et-Loire', 'url': 'https://www.lejsl.com/rss'},
+        {'name': 'Le Bien public', 'url': 'https://www.bienpublic.com/rss'},
+        {'name': 'L\'Yonne républicaine', 'url': 'https://www.lyonne.fr/rss'},
+        {'name': 'L\'Est républicain', 'url': 'https://www.estrepublicain.fr/rss'},
+        {'name': 'France Bleu Bourgogne', 'url': 'https://www.francebleu.fr/rss/a-la-une/bourgogne'}
+    ],
+    'Bretagne': [
+        {'name': 'Ouest-France Bretagne', 'url': 'https://www.ouest-france.fr/rss-en-continu.xml'},
+        {'name': 'Le Télégramme', 'url': 'https://www.letelegramme.fr/rss.xml'},
+        {'name': 'France Bleu Breizh Izel', 'url': 'https://www.francebleu.fr/rss/a-la-une/breizh-izel'}
+    ],
+    'Centre-Val de Loire': [
+        {'name': 'La République du Centre', 'url': 'https://www.larep.fr/rss'},
+        {'name': 'Le Berry républicain', 'url': 'https://www.leberry.fr/rss'},
+        {'name': 'L\'Écho républicain', 'url': 'https://www.lechorepublicain.fr/rss'},
+        {'name': 'France Bleu Berry', 'url': 'https://www.francebleu.fr/rss/a-la-une/berry'}
+    ],
+    'Corse': [
+        {'name': 'Corse-Matin', 'url': 'https://www.corsematin.com/rss'},
+        {'name': 'France Bleu RCFM', 'url': 'https://www.francebleu.fr/rss/a-la-une/rcfm'}
+    ],
+    'Grand Est': [
+        {'name': 'Les Dernières Nouvelles d\'Alsace', 'url': 'https://www.dna.fr/rss'},
+        {'name': 'L\'Alsace', 'url': 'https://www.lalsace.fr/rss'},
+        {'name': 'Le Républicain lorrain', 'url': 'https://www.republicain-lorrain.fr/rss'},
+        {'name': 'L\'Union', 'url': 'https://www.lunion.fr/rss'},
+        {'name': 'Vosges Matin', 'url': 'https://www.vosgesmatin.fr/rss'},
+        {'name': 'France Bleu Alsace', 'url': 'https://www.francebleu.fr/rss/a-la-une/alsace'},
+        {'name': 'France Bleu Lorraine', 'url': 'https://www.francebleu.fr/rss/a-la-une/lorraine-nord'}
+    ],
+    'Hauts-de-France': [
+        {'name': 'La Voix du Nord', 'url': 'https://www.lavoixdunord.fr/rss'},
+        {'name': 'Le Courrier picard', 'url': 'https://www.courrier-picard.fr/rss'},
+        {'name': 'Nord éclair', 'url': 'https://www.nordeclair.fr/rss'},
+        {'name': 'Nord Littoral', 'url': 'https://www.nordlittoral.fr/rss'},
+        {'name': 'France Bleu Nord', 'url': 'https://www.francebleu.fr/rss/a-la-une/nord'}
+    ],
+    'Île-de-France': [
+        {'name': 'Le Parisien', 'url': 'https://www.leparisien.fr/rss.xml'},
+        {'name': 'France Bleu Paris', 'url': 'https://www.francebleu.fr/rss/a-la-une/107-1'},
+        {'name': 'Actu.fr Paris', 'url': 'https://actu.fr/ile-de-france/rss'}
+    ],
+    'Normandie': [
+        {'name': 'La Presse de la Manche', 'url': 'https://www.lamanchelibre.fr/rss'},
+        {'name': 'Paris Normandie', 'url': 'https://www.paris-normandie.fr/rss'},
+        {'name': 'France Bleu Normandie', 'url': 'https://www.francebleu.fr/rss/a-la-une/normandie-caen'}
+    ],
+    'Nouvelle-Aquitaine': [
+        {'name': 'Sud Ouest', 'url': 'https://www.sudouest.fr/rss.xml'},
+        {'name': 'Charente libre', 'url': 'https://www.charentelibre.fr/rss'},
+        {'name': 'Le Populaire du Centre', 'url': 'https://www.lepopulaire.fr/rss'},
+        {'name': 'La Nouvelle République des Pyrénées', 'url': 'https://www.nrpyrenees.fr/rss'},
+        {'name': 'France Bleu Gironde', 'url': 'https://www.francebleu.fr/rss/a-la-une/gironde'},
+        {'name': 'France Bleu Périgord', 'url': 'https://www.francebleu.fr/rss/a-la-une/perigord'}
+    ],
+    'Occitanie': [
+        {'name': 'La Dépêche du Midi', 'url': 'https://www.ladepeche.fr/rss.xml'},
+        {'name': 'Midi libre', 'url': 'https://www.midilibre.fr/rss'},
+        {'name': 'L\'Indépendant', 'url': 'https://www.lindependant.fr/rss'},
+        {'name': 'Centre Presse', 'url': 'https://www.centrepresseaveyron.fr/rss'},
+        {'name': 'France Bleu Toulouse', 'url': 'https://www.francebleu.fr/rss/a-la-une/toulouse'},
+        {'name': 'France Bleu Hérault', 'url': 'https://www.francebleu.fr/rss/a-la-une/herault'}
+    ],
+    'Pays de la Loire': [
+        {'name': 'Le Courrier de l\'Ouest', 'url': 'https://www.courrierdelouest.fr/rss'},
+        {'name': 'Le Maine libre', 'url': 'https://www.ouest-france.fr/maine-libre/rss.xml'},
+        {'name': 'Presse-Océan', 'url': 'https://www.presseocean.fr/rss'},
+        {'name': 'France Bleu Loire Océan', 'url': 'https://www.francebleu.fr/rss/a-la-une/loire-ocean'}
+    ],
+    'Provence-Alpes-Côte d\'Azur': [
+        {'name': 'La Provence', 'url': 'https://www.laprovence.com/rss/une.xml'},
+        {'name': 'Nice-Matin', 'url': 'https://www.nicematin.com/rss'},
+        {'name': 'Var-Matin', 'url': 'https://www.varmatin.com/rss'},
+        {'name': 'France Bleu Azur', 'url': 'https://www.francebleu.fr/rss/a-la-une/azur'}
+    ],
+    'Guadeloupe': [
+        {'name': 'France-Antilles Guadeloupe', 'url': 'https://www.franceantilles.fr/guadeloupe/rss.xml'},
+        {'name': 'France Bleu Guadeloupe', 'url': 'https://www.francebleu.fr/rss/a-la-une/guadeloupe'}
+    ],
+    'Martinique': [
+        {'name': 'France-Antilles Martinique', 'url': 'https://www.franceantilles.fr/martinique/rss.xml'},
+        {'name': 'France Bleu Martinique', 'url': 'https://www.francebleu.fr/rss/a-la-une/martinique'}
+    ],
+    'Guyane': [
+        {'name': 'La Presse de Guyane', 'url': 'https://www.franceguyane.fr/rss.xml'},
+        {'name': 'France Bleu Guyane', 'url': 'https://www.francebleu.fr/rss/a-la-une/guyane'}
+    ],
+    'La Réunion': [
+        {'name': 'Le Journal de l\'île de La Réunion', 'url': 'https://www.clicanoo.re/rss.xml'},
+        {'name': 'Le Quotidien de la Réunion', 'url': 'https://www.lequotidien.re/rss.xml'},
+        {'name': 'France Bleu La Réunion', 'url': 'https://www.francebleu.fr/rss/a-la-une/la-reunion'}
+    ],
+    'Mayotte': [
+        {'name': 'Mayotte Hebdo', 'url': 'https://lejournaldemayotte.yt/feed/'}
+    ]
+}
+
+def source_record(nom, url, region, **settings):
+    """Décrire une source à enregistrer (voir db_utils.add_source)"""
+    return {
+        'nom': nom,
+        'slug': slugify(nom),
+        'url': url,
+        'region': region,
+        'region_slug': slugify(region),
+        **settings
+    }
+
+class SourceRegistry:
+    """Registre des sources en mémoire, chargé depuis la table sources
+
+    Les sources sont indexées par région, par nom et les régions par
+    identifiant d'URL. Le registre est rechargé quand sa version en base
+    change (vérifié au plus toutes les SOURCES_REFRESH_INTERVAL secondes),
+    quel que soit le processus qui l'a modifié, ou à la demande avec reload().
+    """
+
+    def __init__(self, refresh_interval=SOURCES_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = 0
+        self._sources = []
+        self._by_region = {}
+        self._by_name = {}
+        self._regions = {}
+
+    def _load(self):
+        sources = []
+        by_region = {}
+        regions = {}
+        for row in load_sources():
+            source = {
+                'id': row['id'],
+                'name': row['nom'],
+                'slug': row['slug'],
+                'url': row['url'],
+                'region': row['region'],
+                'region_id': row['region_id'],
+                'actif': row['actif'],
+                'delai': row['delai'],
+                'max_articles': row['max_articles']
+            }
+            sources.append(source)
+            regions.setdefault(row['region_slug'], {'id': row['region_id'], 'nom': row['region'], 'slug': row['region_slug']})
+            if source['actif']:
+                by_region.setdefault(source['region'], []).append(source)
+        self._sources = sources
+        self._by_region = by_region
+        self._by_name = {source['name']: source for source in sources}
+        self._regions = regions
+
+    def _refresh(self, force=False):
+        if not force and self._version is not None and time.monotonic() - self._checked < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and self._version is not None and time.monotonic() - self._checked < self.refresh_interval:
+                return
+            ensure_schema()
+            version = get_sources_version()
+            if not version:
+                seed_sources([
+                    source_record(source['name'], source['url'], region)
+                    for region, sources in DEFAULT_SOURCES.items()
+                    for source in sources
+                ])
+                version = get_sources_version()
+            if force or version != self._version:
+                self._load()
+                logger.info(f"📚 Registre des sources chargé: {len(self._sources)} sources")
+            self._version = version
+            self._checked = time.monotonic()
+
+    def reload(self):
+        """Recharger le registre depuis la base"""
+        self._refresh(force=True)
+
+    def version(self):
+        """Version du registre chargé (voir db_utils.get_sources_version)"""
+        self._refresh()
+        return self._version
+
+    def by_region(self):
+        """Sources actives par région : {région: [source, ...]}"""
+        self._refresh()
+        return self._by_region
+
+    def tasks(self):
+        """Couples (région, source) de toutes les sources actives"""
+        return [(region, source) for region, sources in self.by_region().items() for source in sources]
+
+    def all(self):
+        """Toutes les sources, actives ou non"""
+        self._refresh()
+        return list(self._sources)
+
+    def get(self, name):
+        """Source portant ce nom (active ou non), None sinon"""
+        self._refresh()
+        return self._by_name.get(name)
+
+    def region_for_slug(self, slug):
+        """Région ({'id', 'nom', 'slug'}) correspondant à un identifiant d'URL, None sinon"""
+        self._refresh()
+        return self._regions.get(slug.lower())
+
+    def regions(self):
+        """Régions connues, par identifiant d'URL"""
+        self._refresh()
+        return self._regions
+
+sources_registry = SourceRegistry()
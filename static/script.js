@@ -1,9 +1,15 @@
 // Configuration de l'API
 const API_BASE = window.location.origin;
+// Délai avant de rouvrir le flux refusé par un serveur saturé (ms)
+const STREAM_RETRY_DELAY = 60000;
 
 // État de l'application
 let currentView = 'top';
+let currentRegion = null;
 let collectInProgress = false;
+let articleStream = null;
+let lastArticleId = null;
+let statsRefreshTimer = null;
 
 // Utilitaires
 function formatDate(dateString) {
@@ -175,6 +181,7 @@ async function showRegions() {
 // Affichage d'une région spécifique
 async function showRegion(regionId, regionName) {
     currentView = 'region';
+    currentRegion = regionName;
     updateNavigation();
     showLoading(true);
     
@@ -293,6 +300,44 @@ async function performSearch() {
 }
 
 // Collecte RSS
+async function requestCollect() {
+    // Les réponses 409 / 429 contiennent aussi la tâche concernée
+    const response = await fetch(`${API_BASE}/api/collect`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' }
+    });
+    const data = await response.json();
+    return { status: response.status, data };
+}
+
+function renderCollectProgress(job) {
+    const progressFill = document.getElementById('progress-fill');
+    const collectStatus = document.getElementById('collect-status');
+    const collectDetails = document.getElementById('collect-details');
+    const progression = job.progression || { sources_total: 0, sources_traitees: 0, regions: {} };
+    const progress = progression.sources_total ?
+        Math.round(100 * progression.sources_traitees / progression.sources_total) : 0;
+    
+    progressFill.style.width = `${progress}%`;
+    collectStatus.textContent = job.statut === 'en_attente' ?
+        'Collecte en attente de la fin de la collecte en cours...' :
+        `Collecte en cours... ${progression.sources_traitees}/${progression.sources_total} sources`;
+    collectDetails.innerHTML = Object.entries(progression.regions)
+        .filter(([, region]) => region.sources_traitees > 0)
+        .map(([name, region]) => `<p>${region.sources_traitees === region.sources_total ? '✅' : '⏳'} ${name} : ${region.sources_ok}/${region.sources_total} sources, ${region.articles} articles</p>`)
+        .join('');
+}
+
+async function followCollect(jobId) {
+    // Suivre la tâche jusqu'à sa fin
+    while (true) {
+        const job = await apiCall(`/collect/${jobId}`);
+        if (job.statut !== 'en_cours' && job.statut !== 'en_attente') return job;
+        renderCollectProgress(job);
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 async function triggerCollect() {
     if (collectInProgress) {
         showNotification('Une collecte est déjà en cours', 'info');
@@ -302,49 +347,54 @@ async function triggerCollect() {
     collectInProgress = true;
     const refreshBtn = document.getElementById('refresh-btn');
     const originalText = refreshBtn.innerHTML;
-    
-    // Afficher le modal de collecte
     const modal = document.getElementById('collect-modal');
-    modal.style.display = 'flex';
     
     // Mettre à jour le bouton
     refreshBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Collecte...';
     refreshBtn.disabled = true;
     
     try {
-        // Déclencher la collecte
-        await apiCall('/collect', { method: 'POST' });
+        // Déclencher la collecte (ou rejoindre celle en cours)
+        const { status, data } = await requestCollect();
+        if (status === 429) {
+            showNotification(data.message, 'info');
+            return;
+        }
+        if (!data.job) {
+            throw new Error(data.message);
+        }
+        if (status === 409) {
+            showNotification('Une collecte est déjà en cours', 'info');
+        }
+        
+        // Afficher le modal de collecte
+        modal.style.display = 'flex';
+        renderCollectProgress(data.job);
+        const job = await followCollect(data.job.id);
         
-        // Simuler le progrès (la vraie collecte se fait côté serveur)
-        let progress = 0;
-        const progressFill = document.getElementById('progress-fill');
+        document.getElementById('progress-fill').style.width = '100%';
         const collectStatus = document.getElementById('collect-status');
         const collectDetails = document.getElementById('collect-details');
+        if (job.statut === 'terminee') {
+            collectStatus.textContent = 'Collecte terminée !';
+            const nouveaux = job.resultat ? job.resultat.articles_nouveaux : 0;
+            collectDetails.innerHTML = `<p>✅ Collecte RSS terminée : ${nouveaux} nouveaux articles</p>`;
+        } else {
+            collectStatus.textContent = 'Collecte en échec';
+            collectDetails.innerHTML = `<p>❌ ${job.erreur || 'Erreur inconnue'}</p>`;
+        }
         
-        const interval = setInterval(() => {
-            progress += Math.random() * 10;
-            if (progress > 100) progress = 100;
+        setTimeout(() => {
+            modal.style.display = 'none';
+            showNotification(job.statut === 'terminee' ? 'Collecte terminée avec succès !' : 'Erreur lors de la collecte',
+                job.statut === 'terminee' ? 'success' : 'error');
             
-            progressFill.style.width = `${progress}%`;
-            collectStatus.textContent = `Collecte en cours... ${Math.round(progress)}%`;
-            
-            if (progress >= 100) {
-                clearInterval(interval);
-                collectStatus.textContent = 'Collecte terminée !';
-                collectDetails.innerHTML = '<p>✅ Collecte RSS terminée avec succès</p>';
-                
-                setTimeout(() => {
-                    modal.style.display = 'none';
-                    showNotification('Collecte terminée avec succès !', 'success');
-                    
-                    // Recharger les données
-                    loadStats();
-                    if (currentView === 'top') {
-                        showTopArticles();
-                    }
-                }, 2000);
+            // Recharger les données
+            loadStats();
+            if (currentView === 'top') {
+                showTopArticles();
             }
-        }, 500);
+        }, 2000);
         
     } catch (error) {
         modal.style.display = 'none';
@@ -357,6 +407,69 @@ async function triggerCollect() {
     }
 }
 
+// Flux des nouveaux articles (Server-Sent Events)
+function scheduleStatsRefresh() {
+    // Un seul rechargement des stats pour une rafale d'articles
+    if (statsRefreshTimer) return;
+    statsRefreshTimer = setTimeout(() => {
+        statsRefreshTimer = null;
+        loadStats();
+    }, 2000);
+}
+
+function handleNewArticle(event) {
+    const article = JSON.parse(event.data);
+    lastArticleId = event.lastEventId || lastArticleId;
+    scheduleStatsRefresh();
+    
+    const showsArticle = currentView === 'top' ||
+        (currentView === 'region' && currentRegion === article.region);
+    const grid = document.querySelector('.articles-grid');
+    if (!showsArticle || !grid) return;
+    
+    grid.insertAdjacentHTML('afterbegin', createArticleCard(article));
+    const count = document.querySelector('.articles-count .highlight');
+    if (count) {
+        count.textContent = parseInt(count.textContent, 10) + 1;
+    }
+}
+
+function startArticleStream() {
+    if (!window.EventSource) {
+        // Navigateur sans SSE : actualiser les stats toutes les minutes
+        setInterval(loadStats, 60000);
+        return;
+    }
+    
+    // Le navigateur se reconnecte seul et reprend au dernier article reçu (Last-Event-ID)
+    const query = lastArticleId ? `?last_id=${encodeURIComponent(lastArticleId)}` : '';
+    articleStream = new EventSource(`${API_BASE}/api/stream${query}`);
+    articleStream.addEventListener('article', handleNewArticle);
+    articleStream.onerror = () => {
+        // Flux refusé (serveur saturé, 503) : le navigateur abandonne, on réessaie plus tard
+        if (articleStream.readyState === EventSource.CLOSED) {
+            articleStream = null;
+            loadStats();
+            setTimeout(startArticleStream, STREAM_RETRY_DELAY);
+        }
+    };
+}
+
+// Texte issu des flux, inséré dans du HTML
+function escapeHtml(text) {
+    return String(text ?? '')
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+// Lien d'article : uniquement http(s), pas de javascript: ou data:
+function safeUrl(url) {
+    return /^https?:\/\//i.test(url || '') ? escapeHtml(url) : '#';
+}
+
 // Création des composants
 function createArticleCard(article) {
     const description = article.description ? 
@@ -366,11 +479,11 @@ function createArticleCard(article) {
     
     return `
         <div class="article-card fade-in">
-            <h3><a href="${article.url}" target="_blank" rel="noopener">${article.titre}</a></h3>
-            ${description ? `<div class="description">${description}</div>` : ''}
+            <h3><a href="${safeUrl(article.url)}" target="_blank" rel="noopener">${escapeHtml(article.titre)}</a></h3>
+            ${description ? `<div class="description">${escapeHtml(description)}</div>` : ''}
             <div class="meta">
-                <span class="source"><i class="fas fa-newspaper"></i> ${article.source}</span>
-                <span class="region"><i class="fas fa-map-marker-alt"></i> ${article.region}</span>
+                <span class="source"><i class="fas fa-newspaper"></i> ${escapeHtml(article.source)}</span>
+                <span class="region"><i class="fas fa-map-marker-alt"></i> ${escapeHtml(article.region)}</span>
                 <span class="date"><i class="fas fa-clock"></i> ${formatRelativeTime(article.date_publication)}</span>
             </div>
         </div>
@@ -420,8 +533,8 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
-    // Actualiser les stats toutes les minutes
-    setInterval(loadStats, 60000);
+    // Recevoir les nouveaux articles en direct
+    startArticleStream();
 });
 
 // Fermer le modal en cliquant à l'extérieur
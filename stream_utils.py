@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+
+from db_utils import get_articles_after, get_last_article_id
+
+logger = logging.getLogger(__name__)
+
+# Configuration du flux d'articles (Server-Sent Events)
+STREAM_POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL', 5))
+STREAM_BUFFER = int(os.environ.get('STREAM_BUFFER', 200))
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+# Nombre maximum d'articles renvoyés à la reprise d'une connexion (Last-Event-ID)
+STREAM_REPLAY_MAX = int(os.environ.get('STREAM_REPLAY_MAX', 500))
+# Clients du flux par processus : chacun occupe un thread du worker, il en
+# faut qui restent libres pour les autres requêtes (dont le contrôle de santé)
+STREAM_MAX_CLIENTS = int(os.environ.get('STREAM_MAX_CLIENTS', 8))
+# Délai (s) avant qu'un client refusé ne retente sa connexion
+STREAM_RETRY_AFTER = 60
+
+def row_to_event(row):
+    """Convertir une ligne d'article (id en tête) en événement du flux"""
+    article_id, titre, url, description, source, region, date_publication, date_collecte, groupe = row
+    return {
+        'id': article_id,
+        'region': region,
+        'data': {
+            'titre': titre,
+            'url': url,
+            'description': description,
+            'source': source,
+            'region': region,
+            'date_publication': str(date_publication) if date_publication else None,
+            'date_collecte': str(date_collecte) if date_collecte else None,
+            'groupe': groupe
+        }
+    }
+
+def format_event(event):
+    """Sérialiser un événement au format text/event-stream"""
+    data = json.dumps(event['data'], ensure_ascii=False)
+    return f"id: {event['id']}\nevent: article\ndata: {data}\n\n"
+
+class Subscriber:
+    """Abonné au flux : tampon borné d'événements en attente d'envoi
+
+    Si le client lit trop lentement et que le tampon déborde, l'abonnement
+    est clos : le navigateur se reconnecte avec Last-Event-ID et rattrape
+    son retard depuis la base.
+    """
+
+    def __init__(self, region=None, max_events=STREAM_BUFFER):
+        self.region = region
+        self.max_events = max_events
+        self.events = deque()
+        self.overflow = False
+        self.ready = threading.Condition()
+
+    def push(self, events):
+        with self.ready:
+            for event in events:
+                if self.region and event['region'] != self.region:
+                    continue
+                if len(self.events) >= self.max_events:
+                    self.overflow = True
+                    break
+                self.events.append(event)
+            self.ready.notify()
+
+    def wait(self, timeout):
+        """Attendre des événements ; renvoie la liste (éventuellement vide)"""
+        with self.ready:
+            if not self.events and not self.overflow:
+                self.ready.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+            return events
+
+class ArticleBroker:
+    """Diffusion des nouveaux articles aux abonnés du processus
+
+    Un seul thread par processus lit les articles insérés depuis le dernier
+    envoi (id > dernier id) et les distribue à tous les abonnés : le coût en
+    base ne dépend pas du nombre de clients. La collecte du même processus
+    réveille le thread aussitôt ; celle d'un autre processus (worker dédié,
+    autre worker Gunicorn) est vue au plus tard après STREAM_POLL_INTERVAL.
+    """
+
+    def __init__(self, poll_interval=STREAM_POLL_INTERVAL, max_subscribers=STREAM_MAX_CLIENTS):
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last_id = None
+
+    def subscribe(self, region=None):
+        """Créer un abonnement ; None si 'max_subscribers' clients sont déjà connectés"""
+        subscriber = Subscriber(region)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='article-broker', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def notify(self):
+        """Signaler que de nouveaux articles ont été enregistrés"""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    # Plus d'abonnés : le prochain abonnement relancera le thread
+                    self._thread = None
+                    self._last_id = None
+                    return
+                subscribers = list(self._subscribers)
+
+            try:
+                if self._last_id is None:
+                    self._last_id = get_last_article_id()
+                rows = get_articles_after(self._last_id, 1000)
+                while rows:
+                    events = [row_to_event(row) for row in rows]
+                    self._last_id = events[-1]['id']
+                    for subscriber in subscribers:
+                        subscriber.push(events)
+                    rows = get_articles_after(self._last_id, 1000) if len(rows) == 1000 else []
+            except Exception as e:
+                logger.error(f"Erreur diffusion des articles: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+broker = ArticleBroker()
+
+def stream_articles(subscriber, last_id=None):
+    """Générateur text/event-stream des nouveaux articles pour un abonné de 'broker'
+
+    Avec 'last_id' (en-tête Last-Event-ID), les articles manqués depuis cet
+    id sont d'abord renvoyés depuis la base.
+    """
+    region = subscriber.region
+    try:
+        yield f"retry: {int(STREAM_POLL_INTERVAL * 1000)}\n\n"
+
+        sent = last_id or 0
+        if last_id is not None:
+            for row in get_articles_after(last_id, STREAM_REPLAY_MAX, region):
+                event = row_to_event(row)
+                sent = event['id']
+                yield format_event(event)
+
+        while not subscriber.overflow:
+            events = subscriber.wait(STREAM_HEARTBEAT)
+            # Le rattrapage a pu déjà envoyer les premiers événements diffusés
+            events = [event for event in events if event['id'] > sent]
+            if not events:
+                yield ": ping\n\n"
+                continue
+            for event in events:
+                yield format_event(event)
+            sent = events[-1]['id']
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Processus collecteur dédié (COLLECTOR_MODE=worker)
+
+Lance la planification des collectes sans servir l'API :
+    python worker.py
+"""
+
+from app import start_collector
+
+if __name__ == '__main__':
+    start_collector(blocking=True)